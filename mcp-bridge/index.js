@@ -35,6 +35,15 @@ for (const dir of [
   fs.mkdirSync(dir, { recursive: true });
 }
 
+// Write JSON via a dot-prefixed temp file + rename, so readers (the
+// orchestrator and other agents' bridges) never see a half-written file.
+// The temp name doesn't end in .json, so mailbox scans skip it.
+function writeJsonAtomic(filePath, data) {
+  const tmpPath = path.join(path.dirname(filePath), `.${path.basename(filePath)}.${process.pid}.tmp`);
+  fs.writeFileSync(tmpPath, JSON.stringify(data, null, 2));
+  fs.renameSync(tmpPath, filePath);
+}
+
 function createMessage(from, to, type, content) {
   const timestamp = new Date().toISOString();
   const id = `msg-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
@@ -50,7 +59,7 @@ function createMessage(from, to, type, content) {
 
   const targetDir = `${MAILBOX_DIR}/to_${to}`;
   const filePath = `${targetDir}/${id}.json`;
-  fs.writeFileSync(filePath, JSON.stringify(message, null, 2));
+  writeJsonAtomic(filePath, message);
   return message;
 }
 
@@ -76,7 +85,7 @@ function markAsRead(recipient, messageId) {
   if (fs.existsSync(filePath)) {
     const msg = JSON.parse(fs.readFileSync(filePath, "utf-8"));
     msg.read = true;
-    fs.writeFileSync(filePath, JSON.stringify(msg, null, 2));
+    writeJsonAtomic(filePath, msg);
   }
 }
 
@@ -1,18 +1,310 @@
 """Ollama LLM client for orchestrator decisions."""
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import io
 import json
 import logging
 import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import json_compat
 
 logger = logging.getLogger(__name__)
 
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+
+def _extract_json_text(raw_text: str) -> str:
+    """Strip <think> tags and markdown code fences from an LLM response."""
+    if "<think>" in raw_text:
+        raw_text = _THINK_RE.sub("", raw_text)
+    raw_text = raw_text.strip()
+    if "```" in raw_text:
+        match = _CODE_FENCE_RE.search(raw_text)
+        if match:
+            raw_text = match.group(1).strip()
+    return raw_text
+
+
+# Stop tracking braces if no JSON object has opened after this many stream chunks
+_STREAM_SCAN_LIMIT = 256
+
+
+class _JsonObjectScanner:
+    """Incrementally detect when a streamed response has closed its top-level JSON object.
+
+    Braces inside JSON strings and inside <think>...</think> blocks are ignored.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self._in_string = False
+        self._escape = False
+        self._pending = ""
+
+    def feed(self, chunk: str) -> bool:
+        """Consume the next chunk. Returns True once the object is complete."""
+        text = self._pending + chunk
+        self._pending = ""
+        i, n = 0, len(text)
+        while i < n:
+            c = text[i]
+            if self.depth == 0 and c == "<":
+                if text.startswith("<think>", i):
+                    end = text.find("</think>", i)
+                    if end == -1:
+                        self._pending = text[i:]
+                        return False
+                    i = end + len("</think>")
+                    continue
+                if n - i < len("<think>") and "<think>".startswith(text[i:]):
+                    self._pending = text[i:]
+                    return False
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"' and self.depth > 0:
+                self._in_string = True
+            elif c == "{":
+                self.depth += 1
+                self.started = True
+            elif c == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+            i += 1
+        return False
+
+
+class LLMCache:
+    """Response cache for LLM decisions, keyed by the full request.
+
+    Entries live in an in-memory LRU (bounded by max_entries, expired after
+    ttl_seconds). When a path is given, entries are also persisted to SQLite
+    so identical decisions are reused across orchestrator restarts.
+    """
+
+    def __init__(self, path=None, ttl_seconds=1800, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(str(path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, response_json TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache persistence disabled ({path}): {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str, options: dict, fmt=None) -> str:
+        payload = {"model": model, "system": system, "prompt": prompt, "options": options, "format": fmt}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached decision for key, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT response_json, created_at FROM llm_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error:
+                    row = None
+                if row:
+                    entry = (json.loads(row[0]), row[1])
+                    self._entries[key] = entry
+            if entry is None:
+                return None
+            decision, created_at = entry
+            if now - created_at > self.ttl_seconds:
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    try:
+                        self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        self._db.commit()
+                    except sqlite3.Error:
+                        pass
+                return None
+            self._entries.move_to_end(key)
+            self._evict()
+            return dict(decision)
+
+    def set(self, key: str, decision: dict):
+        """Store a parsed decision under key."""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (dict(decision), now)
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, response_json, created_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(decision), now),
+                    )
+                    self._db.execute(
+                        "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.debug(f"LLM cache write failed: {e}")
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
 
 class OllamaClient:
-    def __init__(self, base_url="http://localhost:11434", model="qwen3:8b", disable_thinking=False):
+    def __init__(self, base_url="http://localhost:11434", model="qwen3:8b", disable_thinking=False,
+                 temperature=0.0, max_tokens=384, retry_max_tokens=1024, stop=None, keep_alive="30m",
+                 cache=None):
         self.base_url = base_url
         self.model = model
         self.disable_thinking = disable_thinking
+        self.temperature = temperature
+        # Decisions are ~100-200 tokens; cap generation and retry once with a
+        # larger budget if the JSON came back truncated.
+        self.max_tokens = max_tokens
+        self.retry_max_tokens = retry_max_tokens
+        self.stop = list(stop or [])
+        # How long Ollama keeps the model loaded after a call (avoids cold reloads)
+        self.keep_alive = keep_alive
+        self.cache = cache
+
+        # One keep-alive connection pool for all calls to the local Ollama server
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        ))
+
+    def close(self):
+        """Release pooled connections and the response cache."""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def _options(self, num_predict: int) -> dict:
+        options = {
+            "temperature": self.temperature,
+            "num_predict": num_predict,
+        }
+        if self.stop:
+            options["stop"] = self.stop
+        return options
+
+    def _generate(self, system_prompt: str, prompt: str, options: dict, fmt=None) -> str:
+        """Stream a completion from Ollama and return the accumulated text.
+
+        Stops reading (and closes the connection, which cancels generation)
+        as soon as the first top-level JSON object in the output is complete.
+        fmt, if given, is passed as Ollama's "format" (a JSON schema).
+        """
+        buf = io.StringIO()
+        scanner = _JsonObjectScanner()
+        chunks = 0
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "system": system_prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+        if fmt is not None:
+            payload["format"] = fmt
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=payload,
+            timeout=60,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                part = json_compat.loads(line)
+                token = part.get("response", "")
+                buf.write(token)
+                if scanner is not None:
+                    if scanner.feed(token):
+                        break
+                    chunks += 1
+                    if not scanner.started and chunks > _STREAM_SCAN_LIMIT:
+                        scanner = None  # No JSON in sight -- just accumulate
+                if part.get("done"):
+                    break
+        return buf.getvalue()
+
+    def _decide(self, system_prompt: str, context: str, schema: dict = None) -> dict:
+        """Return the parsed JSON decision for a prompt, using the cache if set.
+
+        With a schema, Ollama constrains decoding so the output matches it.
+
+        Raises json.JSONDecodeError or requests.RequestException on failure.
+        """
+        # Qwen3: append /no_think to suppress thinking tags in output
+        prompt = context
+        if self.disable_thinking:
+            prompt = context + " /no_think"
+
+        budgets = [self.max_tokens]
+        if self.retry_max_tokens > self.max_tokens:
+            budgets.append(self.retry_max_tokens)
+
+        for attempt, num_predict in enumerate(budgets):
+            options = self._options(num_predict)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = LLMCache.make_key(self.model, system_prompt, prompt, options, schema)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.debug("LLM cache hit")
+                    return cached
+
+            raw_text = self._generate(system_prompt, prompt, options, schema)
+
+            # Strip thinking tags (Qwen3 sometimes adds them) and markdown code
+            # blocks; a no-op for schema-constrained output
+            raw_text = _extract_json_text(raw_text)
+
+            try:
+                decision = json_compat.loads(raw_text)
+            except json.JSONDecodeError:
+                if attempt + 1 < len(budgets):
+                    logger.warning(f"LLM response unparseable at num_predict={num_predict}, retrying")
+                    continue
+                raise
+            if cache_key is not None:
+                self.cache.set(cache_key, decision)
+            return decision
 
     def decide(self, context: str) -> dict:
         """Ask the LLM to make a routing decision.
@@ -43,47 +335,14 @@ RGR Pipeline Rules:
 - Do NOT include thinking tags or markdown formatting"""
 
         try:
-            # Qwen3: append /no_think to suppress thinking tags in output
-            prompt = context
-            if self.disable_thinking:
-                prompt = context + " /no_think"
-
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "system": system_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,
-                        "num_predict": 4096,
-                    },
-                },
-                timeout=60,
-            )
-            response.raise_for_status()
-            result = response.json()
-            raw_text = result.get("response", "")
-
-            # Strip thinking tags if present (Qwen3 sometimes adds them)
-            raw_text = re.sub(r"<think>.*?</think>", "", raw_text, flags=re.DOTALL)
-            raw_text = raw_text.strip()
-
-            # Handle markdown code blocks
-            if "```json" in raw_text:
-                raw_text = raw_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_text:
-                raw_text = raw_text.split("```")[1].split("```")[0].strip()
-
-            decision = json.loads(raw_text)
+            decision = self._decide(system_prompt, context)
             logger.info(
                 f"LLM decision: {decision.get('action')} - {decision.get('reasoning')}"
             )
             return decision
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response: {raw_text[:200]}")
+            logger.error(f"Failed to parse LLM response: {e.doc[:200]}")
             return {
                 "action": "flag_human",
                 "message": f"Orchestrator couldn't parse LLM response: {str(e)}",
@@ -97,49 +356,33 @@ RGR Pipeline Rules:
                 "reasoning": "Ollama connection failure",
             }
 
-    def decide_with_system(self, system_prompt: str, context: str) -> dict:
-        """Like decide() but with a custom system prompt."""
+    def decide_with_system(self, system_prompt: str, context: str, schema: dict = None) -> dict:
+        """Like decide() but with a custom system prompt and optional output schema."""
         try:
-            prompt = context
-            if self.disable_thinking:
-                prompt = context + " /no_think"
-
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "system": system_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,
-                        "num_predict": 4096,
-                    },
-                },
-                timeout=60,
-            )
-            response.raise_for_status()
-            result = response.json()
-            raw_text = result.get("response", "")
-
-            raw_text = re.sub(r"<think>.*?</think>", "", raw_text, flags=re.DOTALL)
-            raw_text = raw_text.strip()
-
-            if "```json" in raw_text:
-                raw_text = raw_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in raw_text:
-                raw_text = raw_text.split("```")[1].split("```")[0].strip()
-
-            return json.loads(raw_text)
+            return self._decide(system_prompt, context, schema)
 
         except (json.JSONDecodeError, requests.RequestException) as e:
             logger.error(f"LLM interpret failed: {e}")
             return {"action": "reply", "text": "Sorry, I couldn't process that. Try a direct command or type 'help'."}
 
+    def preload(self) -> bool:
+        """Load the model into memory ahead of the first decision."""
+        try:
+            r = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "prompt": "", "stream": False, "keep_alive": self.keep_alive},
+                timeout=120,
+            )
+            r.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Ollama model preload failed: {e}")
+            return False
+
     def health_check(self) -> bool:
         """Check if Ollama is running and model is available."""
         try:
-            r = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            r = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             r.raise_for_status()
             models = [m["name"] for m in r.json().get("models", [])]
             available = any(self.model.split(":")[0] in m for m in models)
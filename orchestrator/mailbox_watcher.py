@@ -1,25 +1,296 @@
 """Watch the shared mailbox directories for new messages."""
 
-import json
+import atexit
+import heapq
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
 from pathlib import Path
 
+import json_compat
+
+try:
+    from watchdog.events import (
+        FileClosedEvent,
+        FileCreatedEvent,
+        FileModifiedEvent,
+        FileMovedEvent,
+        FileSystemEventHandler,
+    )
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+    HAS_WATCHDOG = True
+except ImportError:
+    FileSystemEventHandler = object
+    HAS_WATCHDOG = False
+
 logger = logging.getLogger(__name__)
 
+# Filesystems where inotify/FSEvents don't see remote writes
+_NETWORK_FS_TYPES = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "afs", "9p", "fuse.sshfs"}
+
+# Directory mtimes newer than this are not trusted for skipping scans, since
+# coarse-grained filesystems can record two writes under the same timestamp.
+_MTIME_SETTLE_NS = 2_000_000_000
+
+# Upper bound on remembered processed-message stems (persisted across restarts)
+_PROCESSED_LIMIT = 10000
+# The append-only processed log is compacted once it holds this many lines
+_PROCESSED_COMPACT_LINES = 2 * _PROCESSED_LIMIT
+
+
+def _is_network_fs(path: Path) -> bool:
+    """Best-effort check (Linux /proc/mounts) whether path lives on a network FS."""
+    try:
+        with open("/proc/mounts") as fh:
+            mounts = [line.split()[1:3] for line in fh if line.strip()]
+    except OSError:
+        return False
+    resolved = str(path.resolve())
+    best, fstype = "", ""
+    for mount_point, mount_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (resolved == mount_point or resolved.startswith(mount_point.rstrip("/") + "/")) \
+                and len(mount_point) > len(best):
+            best, fstype = mount_point, mount_type
+    return fstype in _NETWORK_FS_TYPES
+
+
+# Events that can mean a new message. Open/read events are left out because
+# the watcher's own reads of mailbox files would otherwise wake it up again.
+_MESSAGE_EVENT_TYPES = {"created", "modified", "moved", "closed"}
+
+
+class _MailboxEventHandler(FileSystemEventHandler):
+    """Forward mailbox .json file events to a callback."""
+
+    def __init__(self, on_event):
+        super().__init__()
+        self._on_event = on_event
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in _MESSAGE_EVENT_TYPES:
+            return
+        path = getattr(event, "dest_path", "") or event.src_path
+        if path.endswith(".json") and not os.path.basename(path).startswith("."):
+            self._on_event(path)
+
+
+def _stem_time(name: str) -> float:
+    """Write time encoded in a message file name or stem, in seconds (0 if unrecognized).
+
+    Bridge messages are msg-<epoch ms>-<rand>, orchestrator ones
+    orch-<epoch s>-<seq>-<type>.
+    """
+    prefix, _, rest = name.partition("-")
+    try:
+        stamp = int(rest.split("-", 1)[0])
+    except ValueError:
+        return 0.0
+    return stamp / 1000 if prefix == "msg" else float(stamp)
+
+
+def _msg_sort_key(msg: dict) -> tuple:
+    """Chronological order; ids break ties between same-second timestamps."""
+    return msg.get("timestamp", ""), msg.get("id", "")
+
 
 class MailboxWatcher:
-    def __init__(self, mailbox_dir: str):
+    def __init__(self, mailbox_dir: str, history_len: int = 6):
         self.mailbox_dir = Path(mailbox_dir)
         self.to_dev_dir = self.mailbox_dir / "to_dev"
         self.to_qa_dir = self.mailbox_dir / "to_qa"
         self.to_refactor_dir = self.mailbox_dir / "to_refactor"
-        self._processed = set()
+        self._processed = OrderedDict()
+        # Stems written at or before this time were evicted from _processed
+        # but still count as processed
+        self._evicted_before = 0.0
+        self._processed_path = self.mailbox_dir / ".processed.log"
+        self._processed_lines = 0
+        # Read but not yet handled: kept out of the log until mark_handled(),
+        # so a run that stops first reads them again on restart
+        self._unhandled = set()
+        # The FSM worker logs handled messages while the main loop scans
+        self._processed_lock = threading.RLock()
+        self._dir_mtime = {}
 
         # Ensure dirs exist
         self.to_dev_dir.mkdir(parents=True, exist_ok=True)
         self.to_qa_dir.mkdir(parents=True, exist_ok=True)
         self.to_refactor_dir.mkdir(parents=True, exist_ok=True)
 
+        self._load_processed()
+        atexit.register(self.save_processed)
+
+        # Last few messages for LLM context: seeded from disk once, then kept
+        # current by check_new_messages() instead of rescanning per decision
+        self._history_lock = threading.Lock()
+        self.recent_history = deque(self._load_recent_history(history_len), maxlen=history_len)
+
+        # File events write a byte to this pipe, so the read end can be
+        # waited on with a selector alongside console input
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._changed_lock = threading.Lock()
+        self._changed = set()
+        self._observer = None
+        if HAS_WATCHDOG:
+            if _is_network_fs(self.mailbox_dir):
+                self._observer = PollingObserver(timeout=30)
+                logger.info("Mailbox on network filesystem -- using polling observer")
+            else:
+                self._observer = Observer()
+            # event_filter narrows the inotify mask, so the kernel never
+            # reports opens or reads of mailbox files
+            self._observer.schedule(
+                _MailboxEventHandler(self._push_event), str(self.mailbox_dir), recursive=True,
+                event_filter=[FileCreatedEvent, FileModifiedEvent, FileMovedEvent, FileClosedEvent],
+            )
+            self._observer.daemon = True
+            try:
+                self._observer.start()
+            except OSError as e:
+                logger.warning(f"Mailbox file watching unavailable, falling back to polling: {e}")
+                self._observer = None
+        else:
+            logger.info("watchdog not installed -- mailbox is polled on a timer")
+
+    def _load_recent_history(self, n: int) -> list:
+        """Parse only the n newest message files (by name), oldest first."""
+        names = []
+        for d in [self.to_dev_dir, self.to_qa_dir, self.to_refactor_dir]:
+            with os.scandir(d) as it:
+                names.extend(
+                    (_stem_time(e.name), e.name, e.path) for e in it
+                    if e.name.endswith(".json") and not e.name.startswith(".")
+                )
+        history = []
+        for _, _, path in heapq.nlargest(n, names):
+            try:
+                with open(path, "rb") as fh:
+                    history.append(json_compat.loads(fh.read()))
+            except (json_compat.JSONDecodeError, IOError):
+                continue
+        return sorted(history, key=_msg_sort_key)
+
+    def _load_processed(self):
+        """Restore processed-message stems saved by a previous run."""
+        try:
+            text = self._processed_path.read_text()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable {self._processed_path}: {e}")
+            return
+        stems = []
+        for line in text.splitlines():
+            if line.startswith("#evicted-before "):
+                try:
+                    self._evicted_before = float(line.split(" ", 1)[1])
+                except ValueError:
+                    logger.warning(f"Ignoring bad line in {self._processed_path}: {line!r}")
+            elif line:
+                stems.append(line)
+        self._processed_lines = len(stems)
+        for stem in stems:
+            self._mark_processed(stem)
+
+    def save_processed(self):
+        """Atomically rewrite (compact) the processed log next to the mailboxes."""
+        tmp = self._processed_path.with_name(self._processed_path.name + ".tmp")
+        with self._processed_lock:
+            stems = [stem for stem in self._processed if stem not in self._unhandled]
+            try:
+                tmp.write_text("\n".join([f"#evicted-before {self._evicted_before}", *stems]) + "\n")
+                os.replace(tmp, self._processed_path)
+                self._processed_lines = len(stems)
+            except OSError as e:
+                logger.warning(f"Failed to save {self._processed_path}: {e}")
+
+    def _append_processed(self, stems: list):
+        """Append newly processed stems to the log, compacting it when it gets long."""
+        with self._processed_lock:
+            if self._processed_lines + len(stems) > _PROCESSED_COMPACT_LINES:
+                self.save_processed()
+                return
+            try:
+                with open(self._processed_path, "a") as fh:
+                    fh.write("\n".join(stems) + "\n")
+                self._processed_lines += len(stems)
+            except OSError as e:
+                logger.warning(f"Failed to save {self._processed_path}: {e}")
+
+    def mark_handled(self, *messages: dict):
+        """Log messages from check_new_messages*() as processed once they are handled."""
+        with self._processed_lock:
+            stems = [msg.get("id") for msg in messages if msg.get("id") in self._unhandled]
+            if stems:
+                self._unhandled.difference_update(stems)
+                self._append_processed(stems)
+
+    def _mark_processed(self, stem: str):
+        self._processed[stem] = None
+        self._processed.move_to_end(stem)
+        while len(self._processed) > _PROCESSED_LIMIT:
+            # Message names are time-prefixed: remember the newest evicted
+            # time instead of the stem, so files still on disk stay processed
+            old, _ = self._processed.popitem(last=False)
+            self._evicted_before = max(self._evicted_before, _stem_time(old))
+
+    def _is_processed(self, stem: str) -> bool:
+        if stem in self._processed:
+            return True
+        return 0 < _stem_time(stem) <= self._evicted_before
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # Pipe full -- a wakeup is already pending
+
+    def _push_event(self, path):
+        # Record which mailbox changed (to_qa -> qa) before waking, so a
+        # woken reader always sees it in take_changed()
+        box = os.path.basename(os.path.dirname(path))
+        if box.startswith("to_"):
+            with self._changed_lock:
+                self._changed.add(box[3:])
+        self._wake()
+
+    def take_changed(self) -> set:
+        """Return and reset the recipients whose mailbox saw file events."""
+        with self._changed_lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def fileno(self) -> int:
+        """Wakeup fd, readable while events are pending (for selectors)."""
+        return self._wake_r
+
+    def drain_events(self) -> bool:
+        """Consume pending wakeups; returns True if there were any.
+
+        A burst of writes therefore results in a single wakeup.
+        """
+        woke = False
+        while True:
+            try:
+                if not os.read(self._wake_r, 4096):
+                    return woke
+            except BlockingIOError:
+                return woke
+            woke = True
+
+    def stop(self):
+        """Stop the filesystem observer, if any."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+
     def check_new_messages(self, recipient: str) -> list:
         """Check for new messages for a recipient.
 
@@ -27,29 +298,84 @@ class MailboxWatcher:
         the 'read' flag on the JSON file, because agents calling check_messages
         via MCP can mark messages as read before the orchestrator sees them.
         """
+        return self.check_new_messages_batch((recipient,))[recipient]
+
+    def check_new_messages_batch(self, recipients) -> dict:
+        """Check several mailboxes back to back; returns {recipient: [messages]}.
+
+        The history is updated once for the batch. Messages are only logged
+        as processed by mark_handled(), so call it once each is dealt with;
+        unhandled ones are returned again after a restart.
+        """
+        new_stems = []
+        results = {recipient: self._scan_mailbox(recipient, new_stems) for recipient in recipients}
+        new_messages = [msg for msgs in results.values() for msg in msgs]
+        if new_stems:
+            self._append_processed(new_stems)
+        if new_messages:
+            # Scans go mailbox by mailbox; the deque must end on the newest
+            new_messages.sort(key=_msg_sort_key)
+            with self._history_lock:
+                self.recent_history.extend(new_messages)
+        return results
+
+    def _scan_mailbox(self, recipient: str, new_stems: list) -> list:
+        """Read unprocessed messages from one mailbox and mark them processed.
+
+        Stems of messages that mark_handled() can't match by id are appended
+        to new_stems, to be logged right away.
+        """
         dir_map = {"dev": self.to_dev_dir, "qa": self.to_qa_dir, "refactor": self.to_refactor_dir}
         target_dir = dir_map.get(recipient, self.to_dev_dir)
         new_messages = []
 
-        for f in sorted(target_dir.glob("*.json")):
-            if f.stem in self._processed:
-                continue
+        # Skip the scan entirely if nothing was added/removed since last poll
+        try:
+            st = os.stat(target_dir)
+        except OSError as e:
+            logger.warning(f"Failed to stat mailbox {target_dir}: {e}")
+            return new_messages
+        if st.st_mtime_ns == self._dir_mtime.get(target_dir):
+            return new_messages
+
+        with os.scandir(target_dir) as it:
+            unseen = sorted(
+                (entry.name, entry.path) for entry in it
+                if entry.name.endswith(".json") and not self._is_processed(entry.name[:-5])
+            )
+
+        all_read = True
+        for name, path in unseen:
             try:
-                msg = json.loads(f.read_text())
+                with open(path, "rb") as fh:
+                    msg = json_compat.loads(fh.read())
                 new_messages.append(msg)
-                self._processed.add(f.stem)
-            except (json.JSONDecodeError, IOError) as e:
-                logger.warning(f"Failed to read message {f}: {e}")
+                stem = name[:-5]
+                with self._processed_lock:
+                    self._mark_processed(stem)
+                    if isinstance(msg, dict) and msg.get("id") == stem:
+                        self._unhandled.add(stem)
+                    else:
+                        new_stems.append(stem)  # mark_handled() can't match it by id
+            except (json_compat.JSONDecodeError, IOError) as e:
+                all_read = False
+                logger.warning(f"Failed to read message {path}: {e}")
+
+        # Only trust the mtime gate once every file was read (a half-written
+        # file must be retried) and the mtime is old enough to be unambiguous.
+        if all_read and time.time_ns() - st.st_mtime_ns > _MTIME_SETTLE_NS:
+            self._dir_mtime[target_dir] = st.st_mtime_ns
+        else:
+            self._dir_mtime.pop(target_dir, None)
 
         if new_messages:
-            logger.info(
-                f"Found {len(new_messages)} new message(s) for {recipient}"
-            )
+            logger.info("Found %d new message(s) for %s", len(new_messages), recipient)
         return new_messages
 
     def get_latest_message(self, recipient: str):
         """Get the most recent unprocessed message."""
         messages = self.check_new_messages(recipient)
+        self.mark_handled(*messages)
         if messages:
             return max(messages, key=lambda m: m.get("timestamp", ""))
         return None
@@ -58,18 +384,16 @@ class MailboxWatcher:
         """Clear all messages for a recipient."""
         dir_map = {"dev": self.to_dev_dir, "qa": self.to_qa_dir, "refactor": self.to_refactor_dir}
         target_dir = dir_map.get(recipient, self.to_dev_dir)
-        for f in target_dir.glob("*.json"):
-            f.unlink()
+        with self._processed_lock:
+            for f in target_dir.glob("*.json"):
+                f.unlink()
+                self._processed.pop(f.stem, None)
+                self._unhandled.discard(f.stem)
+            self.save_processed()
         logger.info(f"Cleared mailbox for {recipient}")
 
-    def get_conversation_history(self) -> list:
-        """Get all messages in chronological order for context."""
-        all_messages = []
-        for d in [self.to_dev_dir, self.to_qa_dir, self.to_refactor_dir]:
-            for f in d.glob("*.json"):
-                try:
-                    msg = json.loads(f.read_text())
-                    all_messages.append(msg)
-                except (json.JSONDecodeError, IOError):
-                    pass
-        return sorted(all_messages, key=lambda m: m.get("timestamp", ""))
+    def get_recent_history(self, n: int) -> list:
+        """Get the n most recent messages (at most history_len) in chronological order."""
+        with self._history_lock:
+            recent = list(self.recent_history)[-n:]
+        return sorted(recent, key=_msg_sort_key)
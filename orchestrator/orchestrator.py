@@ -18,18 +18,39 @@ Usage:
 
 import argparse
 import csv
-import json
+import itertools
+import os
+import re
 import subprocess
 import threading
 import queue
+import selectors
+import signal
 import time
 import logging
 import sys
 import yaml
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from types import MappingProxyType
 
-from llm_client import OllamaClient
+import json_compat
+from llm_client import LLMCache, OllamaClient
 from mailbox_watcher import MailboxWatcher
+from tmux_control import TmuxControlClient
+
+# libyaml-backed loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
+try:
+    import pygit2
+    HAS_PYGIT2 = True
+except ImportError:
+    HAS_PYGIT2 = False
 
 from enum import Enum
 
@@ -57,25 +78,26 @@ if not project_dir.is_dir():
 
 # --- Load & merge configs ---
 with open(orchestrator_dir / "config.yaml") as f:
-    config = yaml.safe_load(f)
+    config = yaml.load(f, Loader=YamlSafeLoader)
 
 with open(project_dir / "config.yaml") as f:
-    project_config = yaml.safe_load(f)
+    project_config = yaml.load(f, Loader=YamlSafeLoader)
 
-# Deep-merge: project overrides shared (two levels deep so that e.g.
+# Deep-merge: project overrides shared at any depth, so that e.g.
 # agents.dev from project config merges with agents.dev defaults rather
-# than replacing the entire agents.dev dict).
-for key, val in project_config.items():
-    if isinstance(val, dict) and key in config and isinstance(config[key], dict):
-        merged = {**config[key]}
-        for k2, v2 in val.items():
-            if isinstance(v2, dict) and k2 in merged and isinstance(merged[k2], dict):
-                merged[k2] = {**merged[k2], **v2}
-            else:
-                merged[k2] = v2
-        config[key] = merged
-    else:
-        config[key] = val
+# than replacing the entire agents.dev dict.
+def deep_merge(base: dict, override: dict) -> dict:
+    """Return base with override merged in; nested dicts merge recursively."""
+    merged = dict(base)
+    for key, val in override.items():
+        if isinstance(val, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], val)
+        else:
+            merged[key] = val
+    return merged
+
+
+config = deep_merge(config, project_config or {})
 
 # --- Resolve per-project paths ---
 mailbox_dir = str(root_dir / "shared" / args.project / "mailbox")
@@ -94,14 +116,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def _apply_scheduling(sched_cfg: dict):
+    """Optionally pin the process to CPU cores and raise it to SCHED_FIFO (Linux only).
+
+    Runs before any worker thread starts, so every thread inherits it.
+    """
+    cpus = sched_cfg.get("cpu_affinity") or []
+    if cpus:
+        try:
+            os.sched_setaffinity(0, {int(cpu) for cpu in cpus})
+            logger.info(f"Pinned orchestrator to CPU(s) {sorted(cpus)}")
+        except (AttributeError, OSError, ValueError) as e:
+            logger.warning(f"Could not set CPU affinity {cpus}: {e}")
+    priority = sched_cfg.get("realtime_priority", 0)
+    if priority:
+        try:
+            # RESET_ON_FORK: git/tmux child processes go back to normal scheduling
+            os.sched_setscheduler(0, os.SCHED_FIFO | os.SCHED_RESET_ON_FORK, os.sched_param(priority))
+            logger.info(f"Running orchestrator with SCHED_FIFO priority {priority}")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not enable SCHED_FIFO (needs CAP_SYS_NICE): {e}")
+
+
+_apply_scheduling(config.get("scheduling", {}))
+
 # --- Initialize Components ---
+llm_cache_cfg = config["llm"].get("cache", {})
+llm_cache = None
+if llm_cache_cfg.get("enabled", True):
+    Path(mailbox_dir).parent.mkdir(parents=True, exist_ok=True)
+    llm_cache = LLMCache(
+        path=Path(mailbox_dir).parent / "llm_cache.sqlite3" if llm_cache_cfg.get("persist", True) else None,
+        ttl_seconds=llm_cache_cfg.get("ttl_seconds", 1800),
+        max_entries=llm_cache_cfg.get("max_entries", 1024),
+    )
+
 llm = OllamaClient(
     base_url=config["llm"]["base_url"],
     model=config["llm"]["model"],
     disable_thinking=config["llm"].get("disable_thinking", False),
+    temperature=config["llm"].get("temperature", 0.0),
+    max_tokens=config["llm"].get("max_tokens", 384),
+    retry_max_tokens=config["llm"].get("retry_max_tokens", 1024),
+    stop=config["llm"].get("stop"),
+    keep_alive=config["llm"].get("keep_alive", "30m"),
+    cache=llm_cache,
 )
 
 mailbox = MailboxWatcher(mailbox_dir=mailbox_dir)
+# Outgoing mailbox dirs (created by MailboxWatcher above)
+_mailbox_dirs = {
+    "qa": mailbox.to_qa_dir,
+    "dev": mailbox.to_dev_dir,
+    "refactor": mailbox.to_refactor_dir,
+}
 
 # --- Session Report ---
 session_report_path = project_dir / "session-report.md"
@@ -147,10 +216,34 @@ def log_file_changes(task_id: str, phase: str, repo_path: str, source_branch: st
 
 
 # --- Load Tasks ---
-with open(tasks_path) as f:
-    tasks_data = json.load(f)
+with open(tasks_path, "rb") as f:
+    tasks_data = json_compat.loads(f.read())
 
 tasks = tasks_data["tasks"]
+_status_counts = Counter(t["status"] for t in tasks)
+
+
+# get_current_task() result, recomputed only after a status change
+_current_task_cache = (None, None)
+_current_task_dirty = True
+# Every task before this index is completed or stuck, so scans start here
+_task_cursor = 0
+_TERMINAL_STATUSES = frozenset(("completed", "stuck"))
+# Set by set_status; the FSM worker only checks for all-done after a change
+_status_changed = False
+
+
+def set_status(task: dict, status: str):
+    """Change a task's status, keeping _status_counts in step."""
+    global _current_task_dirty, _task_cursor, _status_changed
+    if task["status"] in _TERMINAL_STATUSES and status not in _TERMINAL_STATUSES:
+        # Task re-queued: make sure the cursor hasn't skipped past it
+        _task_cursor = min(_task_cursor, tasks.index(task))
+    _status_counts[task["status"]] -= 1
+    _status_counts[status] += 1
+    task["status"] = status
+    _current_task_dirty = True
+    _status_changed = True
 
 rgr_state = RGRState.IDLE
 _blocked_context = None  # Stores (phase, task, message_content) when BLOCKED
@@ -158,6 +251,12 @@ _blocked_context = None  # Stores (phase, task, message_content) when BLOCKED
 # --- Track current task branch suffix ---
 current_task_id = None
 
+# Read once; config doesn't change after startup
+max_attempts_per_task = config["tasks"]["max_attempts_per_task"]
+_agent_working_dirs = {
+    agent: agent_cfg.get("working_dir", "") for agent, agent_cfg in config.get("agents", {}).items()
+}
+
 # --- tmux nudge config ---
 tmux_session = config.get("tmux", {}).get("session_name", "devqa")
 tmux_nudge_prompt = config.get("tmux", {}).get(
@@ -166,12 +265,17 @@ tmux_nudge_prompt = config.get("tmux", {}).get(
 )
 tmux_nudge_cooldown = config.get("tmux", {}).get("nudge_cooldown_seconds", 30)
 # Build agent -> pane target mapping from config
-_agent_pane_targets = {}
+_pane_targets = {}
 for agent_name, agent_cfg in config.get("agents", {}).items():
     pane = agent_cfg.get("pane")
     if pane:
-        _agent_pane_targets[agent_name] = f"{tmux_session}:{pane}"
+        _pane_targets[agent_name] = f"{tmux_session}:{pane}"
+# Agents without a configured pane fall back to a window named after the agent
+for agent_name in ("qa", "dev", "refactor"):
+    _pane_targets.setdefault(agent_name, f"{tmux_session}:{agent_name}")
+_agent_pane_targets = MappingProxyType(_pane_targets)
 _last_nudge = {}
+_tmux_control = TmuxControlClient(tmux_session)
 
 
 # --- Git helpers ---
@@ -205,12 +309,47 @@ def run_git_command(cwd: str, *git_args, quiet: bool = False) -> tuple[bool, str
         return False, str(e)
 
 
+# In-process libgit2 handles for read-only queries (avoids a git fork per call).
+# State-changing operations (checkout, merge, stash) still go through the CLI.
+_git_repos = {}
+
+
+def _open_repo(path: str):
+    """Return a cached pygit2.Repository for path, or None if unavailable."""
+    if not HAS_PYGIT2 or not path:
+        return None
+    if path not in _git_repos:
+        try:
+            _git_repos[path] = pygit2.Repository(os.path.expanduser(path))
+        except (pygit2.GitError, KeyError) as e:
+            logger.debug(f"pygit2 cannot open {path}, using git CLI: {e}")
+            _git_repos[path] = None
+    return _git_repos[path]
+
+
 def get_default_branch(repo_path: str) -> str:
     """Detect the default branch name (main, master, etc.)."""
+    repo = _open_repo(repo_path)
+    if repo is not None:
+        try:
+            if repo.head_is_detached:
+                return "main"
+            return repo.head.shorthand
+        except pygit2.GitError:
+            pass  # Unborn HEAD -- let git resolve the symbolic ref
     success, output = run_git_command(repo_path, "symbolic-ref", "--short", "HEAD")
     return output.strip() if success else "main"
 
 
+def branch_exists(repo_path: str, branch: str) -> bool:
+    """Check whether a local branch exists."""
+    repo = _open_repo(repo_path)
+    if repo is not None:
+        return branch in repo.branches.local
+    exists, _ = run_git_command(repo_path, "rev-parse", "--verify", branch, quiet=True)
+    return exists
+
+
 # Resolve default branch at startup (used by merge operations)
 default_branch = get_default_branch(repo_dir) if repo_dir else "main"
 
@@ -231,6 +370,18 @@ def git_merge_branch(worktree_path: str, source_branch: str) -> tuple[bool, str]
     return True, output
 
 
+def _has_local_changes(repo_path: str) -> bool:
+    """Return True if the working tree has modified, staged or untracked files."""
+    repo = _open_repo(repo_path)
+    if repo is not None:
+        try:
+            return bool(repo.status())
+        except pygit2.GitError as e:
+            logger.debug(f"pygit2 status failed for {repo_path}, using git CLI: {e}")
+    _, status_output = run_git_command(repo_path, "status", "--porcelain")
+    return bool(status_output.strip())
+
+
 def git_merge_into_default(repo_path: str, source_branch: str) -> tuple[bool, str]:
     """Merge a branch into the default branch in the main repo directory.
 
@@ -241,8 +392,7 @@ def git_merge_into_default(repo_path: str, source_branch: str) -> tuple[bool, st
     """
     # Stash any uncommitted changes (including untracked files)
     stashed = False
-    _, status_output = run_git_command(repo_path, "status", "--porcelain")
-    if status_output.strip():
+    if _has_local_changes(repo_path):
         success, stash_output = run_git_command(repo_path, "stash", "push", "--include-untracked", "-m", f"orchestrator-auto-stash-before-{source_branch}")
         if success and "No local changes" not in stash_output:
             stashed = True
@@ -275,30 +425,84 @@ def git_merge_into_default(repo_path: str, source_branch: str) -> tuple[bool, st
     return True, output
 
 
-def tmux_clear(agent: str):
-    """Send /clear to an agent's tmux pane to reset context."""
-    target = _agent_pane_targets.get(agent, f"{tmux_session}:{agent}")
+# Whether tmux supports run-shell -d (tmux >= 3.2); None until checked
+_tmux_run_shell_delay = None
+
+
+def _tmux_supports_delay() -> bool:
+    """Check `tmux -V` once for run-shell -d support (unknown versions assume yes)."""
+    global _tmux_run_shell_delay
+    if _tmux_run_shell_delay is None:
+        try:
+            version = subprocess.run(["tmux", "-V"], capture_output=True, text=True, timeout=5).stdout.strip()
+        except (FileNotFoundError, subprocess.SubprocessError):
+            version = ""
+        m = re.search(r"(\d+)\.(\d+)", version)
+        _tmux_run_shell_delay = not m or (int(m[1]), int(m[2])) >= (3, 2)
+        if not _tmux_run_shell_delay:
+            logger.info(f"{version} is older than 3.2 -- nudges use two tmux calls with a pause")
+    return _tmux_run_shell_delay
+
+
+def _tmux_run(*commands: list[str], control: bool = True) -> subprocess.CompletedProcess:
+    """Run tmux commands as one ;-chained line, via the control-mode client when attached."""
+    if control:
+        result = _tmux_control.run(*commands)
+        if result is not None:
+            return result
+    argv = ["tmux"]
+    for cmd in commands:
+        argv += [*cmd, ";"]
+    return subprocess.run(argv[:-1], capture_output=True, text=True, timeout=5)
+
+
+def _tmux_send_lines(targets, text: str) -> subprocess.CompletedProcess:
+    """Type text into one or more tmux panes and press Enter, as a single tmux command.
+
+    Claude Code's TUI needs a brief gap between input and submit for the
+    keypress to register; run-shell -d waits inside the tmux server, so no
+    second command or Python sleep is needed, and all panes share the one
+    gap. tmux older than 3.2 lacks -d and gets two commands with a sleep.
+    """
+    keys = [["send-keys", "-t", target, "-l", text] for target in targets]
+    enters = [["send-keys", "-t", target, "Enter"] for target in targets]
+    # Control mode reads one command per line, so multi-line text uses the CLI
+    control = "\n" not in text
+    if _tmux_supports_delay():
+        return _tmux_run(*keys, ["run-shell", "-d", "0.2"], *enters, control=control)
+    result = _tmux_run(*keys, control=control)
+    if result.returncode != 0:
+        return result
+    time.sleep(0.2)
+    return _tmux_run(*enters)
+
+
+def _tmux_send_line(target: str, text: str) -> subprocess.CompletedProcess:
+    """Type text into a tmux pane and press Enter."""
+    return _tmux_send_lines((target,), text)
+
+
+def tmux_clear(*agents: str):
+    """Send /clear to agents' tmux panes (one tmux command) to reset context."""
+    if not _tmux_available():
+        return
+    targets = [_agent_pane_targets[agent] for agent in agents]
     try:
-        subprocess.run(
-            ["tmux", "send-keys", "-t", target, "-l", "/clear"],
-            capture_output=True, text=True, timeout=5,
-        )
-        time.sleep(0.2)
-        subprocess.run(
-            ["tmux", "send-keys", "-t", target, "Enter"],
-            capture_output=True, text=True, timeout=5,
-        )
-        logger.info(f"Sent /clear to {agent} (target={target})")
+        result = _tmux_send_lines(targets, "/clear")
+        if result.returncode != 0:
+            logger.warning(f"Failed to send /clear to {', '.join(agents)}: {result.stderr.strip()}")
+            return
+        logger.info(f"Sent /clear to {', '.join(agents)} (targets={', '.join(targets)})")
         time.sleep(1)  # Give Claude Code a moment to process
     except subprocess.SubprocessError as e:
-        logger.warning(f"Failed to send /clear to {agent}: {e}")
+        logger.warning(f"Failed to send /clear to {', '.join(agents)}: {e}")
 
 
 def _pane_has_prompt(target: str) -> bool:
     """Check if a tmux pane shows a ready prompt (> at end of last line)."""
     try:
         result = subprocess.run(
-            ["tmux", "capture-pane", "-t", target, "-p", "-l", "5"],
+            ["tmux", "capture-pane", "-t", target, "-p"],
             capture_output=True, text=True, timeout=5,
         )
         if result.returncode != 0:
@@ -313,19 +517,25 @@ def _pane_has_prompt(target: str) -> bool:
         return False
 
 
-def _wait_for_pane_ready(agent: str, max_wait: float = 20.0, poll_interval: float = 2.0) -> bool:
-    """Wait until an agent's pane shows a ready prompt, up to max_wait seconds."""
-    target = _agent_pane_targets.get(agent, f"{tmux_session}:{agent}")
+def _wait_for_panes_ready(agents, max_wait: float = 20.0, poll_interval: float = 2.0) -> bool:
+    """Wait until every agent's pane shows a ready prompt, up to max_wait seconds in total."""
+    waiting = list(agents)
     elapsed = 0.0
     while elapsed < max_wait:
-        if _pane_has_prompt(target):
+        waiting = [agent for agent in waiting if not _pane_has_prompt(_agent_pane_targets[agent])]
+        if not waiting:
             return True
         time.sleep(poll_interval)
         elapsed += poll_interval
-    logger.debug(f"Pane {agent} not ready after {max_wait}s -- nudging anyway")
+    logger.debug(f"Pane(s) {', '.join(waiting)} not ready after {max_wait}s -- nudging anyway")
     return False
 
 
+def _wait_for_pane_ready(agent: str, max_wait: float = 20.0, poll_interval: float = 2.0) -> bool:
+    """Wait until an agent's pane shows a ready prompt, up to max_wait seconds."""
+    return _wait_for_panes_ready((agent,), max_wait, poll_interval)
+
+
 def tmux_nudge(agent: str, retries: int = 0, max_retries: int = 3, retry_delay: float = 5.0):
     """Send a nudge to an agent's tmux window via send-keys.
 
@@ -337,36 +547,32 @@ def tmux_nudge(agent: str, retries: int = 0, max_retries: int = 3, retry_delay:
     now = time.time()
     last = _last_nudge.get(agent, 0)
     if retries == 0 and now - last < tmux_nudge_cooldown:
+        # Lazy %-formatting: this path runs on every mailbox event during cooldown
         logger.debug(
-            f"Skipping nudge to {agent} (cooldown: {int(tmux_nudge_cooldown - (now - last))}s remaining)"
+            "Skipping nudge to %s (cooldown: %ds remaining)", agent, tmux_nudge_cooldown - (now - last)
         )
         return
 
-    target = _agent_pane_targets.get(agent, f"{tmux_session}:{agent}")
+    if not _tmux_available():
+        return
+
+    target = _agent_pane_targets[agent]
 
     # Wait for the agent's pane to be ready (shows prompt)
     if retries == 0:
         _wait_for_pane_ready(agent)
 
     try:
-        # Send text and Enter separately — Claude Code's TUI needs a brief
-        # gap between input and submit for the keypress to register.
-        result = subprocess.run(
-            ["tmux", "send-keys", "-t", target, "-l", tmux_nudge_prompt],
-            capture_output=True, text=True, timeout=5,
-        )
+        result = _tmux_send_line(target, tmux_nudge_prompt)
         if result.returncode != 0:
             logger.warning(f"tmux send-keys to {agent} failed (target={target}): {result.stderr.strip()}")
+            if _tmux_session_lost():
+                return
             if retries < max_retries:
                 logger.info(f"Will retry nudge to {agent} in {retry_delay}s (attempt {retries + 1}/{max_retries})")
                 time.sleep(retry_delay)
                 return tmux_nudge(agent, retries=retries + 1, max_retries=max_retries, retry_delay=retry_delay)
             return
-        time.sleep(0.2)
-        subprocess.run(
-            ["tmux", "send-keys", "-t", target, "Enter"],
-            capture_output=True, text=True, timeout=5,
-        )
         _last_nudge[agent] = now
         logger.info(f"Nudged {agent} via tmux send-keys (target={target})")
     except FileNotFoundError:
@@ -381,8 +587,53 @@ def tmux_nudge(agent: str, retries: int = 0, max_retries: int = 3, retry_delay:
         logger.warning(f"tmux nudge to {agent} failed: {e}")
 
 
+# (monotonic time of last probe, result) for check_tmux_session
+_TMUX_SESSION_TTL = 5.0
+_tmux_session_check = (None, False)
+# Set in main() from the startup probe; False while the session is known to be gone
+_tmux_ok = None
+
+
+def tmux_nudge_batch(agents):
+    """Nudge several agents with one tmux command after a shared readiness wait.
+
+    Agents still in cooldown are skipped. If the batched send fails, falls
+    back to tmux_nudge() per agent, which has its own retries.
+    """
+    now = time.time()
+    due = [agent for agent in agents if now - _last_nudge.get(agent, 0) >= tmux_nudge_cooldown]
+    if not due or not _tmux_available():
+        return
+    _wait_for_panes_ready(due)
+    targets = [_agent_pane_targets[agent] for agent in due]
+    try:
+        result = _tmux_send_lines(targets, tmux_nudge_prompt)
+    except FileNotFoundError:
+        logger.warning("tmux not found — nudge skipped (agents must poll manually)")
+        return
+    except subprocess.SubprocessError as e:
+        logger.warning(f"Batched tmux nudge to {', '.join(due)} failed: {e}")
+        result = None
+    if result is not None and result.returncode == 0:
+        for agent in due:
+            _last_nudge[agent] = now
+        logger.info(f"Nudged {', '.join(due)} via tmux send-keys (targets={', '.join(targets)})")
+        return
+    if result is not None:
+        logger.warning(f"Batched tmux nudge to {', '.join(due)} failed: {result.stderr.strip()}")
+        if _tmux_session_lost():
+            return
+    for agent in due:
+        tmux_nudge(agent)
+
+
 def check_tmux_session() -> bool:
-    """Check if the tmux session exists."""
+    """Check if the tmux session exists (cached for a few seconds)."""
+    global _tmux_session_check
+    now = time.monotonic()
+    checked_at, exists = _tmux_session_check
+    if checked_at is not None and now - checked_at < _TMUX_SESSION_TTL:
+        return exists
     try:
         result = subprocess.run(
             ["tmux", "has-session", "-t", tmux_session],
@@ -390,51 +641,99 @@ def check_tmux_session() -> bool:
             text=True,
             timeout=5,
         )
-        return result.returncode == 0
+        exists = result.returncode == 0
     except (FileNotFoundError, subprocess.SubprocessError):
+        exists = False
+    _tmux_session_check = (now, exists)
+    return exists
+
+
+def _tmux_available() -> bool:
+    """Whether nudges can be sent; while the session is gone, re-probes (TTL-cached)."""
+    global _tmux_ok
+    if _tmux_ok is False and check_tmux_session():
+        _tmux_ok = True
+        logger.info(f"tmux session '{tmux_session}' detected — nudges enabled")
+    return _tmux_ok is not False
+
+
+def _tmux_session_lost() -> bool:
+    """Re-probe after a failed send; disables nudges (logged once) if the session is gone."""
+    global _tmux_ok, _tmux_session_check
+    _tmux_session_check = (None, False)
+    if check_tmux_session():
         return False
+    if _tmux_ok is not False:
+        logger.warning(f"tmux session '{tmux_session}' is gone — nudges skipped until it returns")
+    _tmux_ok = False
+    return True
 
 
 # --- Interactive command interface ---
-_cmd_queue = queue.Queue()
 _paused = False
+_stdin_buf = b""
 
 
-def _stdin_reader():
-    """Background thread that reads stdin and queues commands."""
-    while True:
-        try:
-            line = input()
-            if line.strip():
-                _cmd_queue.put(line.strip())
-        except EOFError:
-            break
+def _read_stdin_commands():
+    """Return complete command lines available on stdin, or None at EOF.
+
+    Reads the fd directly: a buffered readline() could pull several lines
+    into Python's buffer, leaving the fd unreadable while commands wait.
+    """
+    global _stdin_buf
+    data = os.read(sys.stdin.fileno(), 4096)
+    if not data:
+        if not _stdin_buf:
+            return None
+        data = b"\n"  # EOF after an unterminated last line
+    *lines, _stdin_buf = (_stdin_buf + data).split(b"\n")
+    return [cmd for cmd in (line.decode(errors="replace").strip() for line in lines) if cmd]
 
 
 def send_to_pane(agent: str, text: str):
     """Send arbitrary text to an agent's tmux pane and press Enter."""
-    target = _agent_pane_targets.get(agent, f"{tmux_session}:{agent}")
+    target = _agent_pane_targets[agent]
     try:
-        subprocess.run(
-            ["tmux", "send-keys", "-t", target, "-l", text],
-            capture_output=True, text=True, timeout=5,
-        )
-        time.sleep(0.2)
-        subprocess.run(
-            ["tmux", "send-keys", "-t", target, "Enter"],
-            capture_output=True, text=True, timeout=5,
-        )
+        _tmux_send_line(target, text)
         print(f"  Sent to {agent}: {text[:80]}")
     except subprocess.SubprocessError as e:
         print(f"  Failed to send to {agent}: {e}")
 
 
+# Single-word console commands; handle_command matches these case-insensitively
+_BARE_COMMANDS = frozenset({"help", "status", "tasks", "skip", "pause", "resume", "log"})
+
+# Ollama structured-output schema for interpret_natural_command's reply
+_COMMAND_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {
+            "type": "string",
+            "enum": [
+                "msg_dev", "msg_qa", "msg_refactor",
+                "nudge_dev", "nudge_qa", "nudge_refactor",
+                "skip", "pause", "resume", "status", "reply",
+            ],
+        },
+        "text": {"type": "string"},
+        "reasoning": {"type": "string"},
+    },
+    "required": ["action", "text"],
+}
+
+
 def interpret_natural_command(text: str):
     """Use the LLM to interpret a natural language command."""
+    # A bare command with stray punctuation ("status?", "/pause") needs no LLM
+    keyword = text.strip().strip("/.!?").strip().lower()
+    if keyword in _BARE_COMMANDS:
+        handle_command(keyword)
+        return
+
     idx, task = get_current_task()
-    completed = sum(1 for t in tasks if t["status"] == "completed")
-    stuck = sum(1 for t in tasks if t["status"] == "stuck")
-    pending = sum(1 for t in tasks if t["status"] == "pending")
+    completed = _status_counts["completed"]
+    stuck = _status_counts["stuck"]
+    pending = _status_counts["pending"]
 
     system = """You are the orchestrator's command interpreter. The human typed a message in the orchestrator console.
 Interpret their intent and respond with JSON only:
@@ -457,13 +756,13 @@ Actions:
 Keep "text" concise and actionable."""
 
     context = f"""## Current State
-- Current task: {json.dumps(task, indent=2) if task else "None"}
+- Current task: {_task_json(task) if task else "None"}
 - Completed: {completed}, Pending: {pending}, Stuck: {stuck}, Paused: {_paused}
 
 ## Human said:
 {text}"""
 
-    decision = llm.decide_with_system(system, context)
+    decision = llm.decide_with_system(system, context, schema=_COMMAND_SCHEMA)
     action = decision.get("action", "reply")
     reply_text = decision.get("text", "")
 
@@ -562,14 +861,14 @@ def handle_command(cmd: str):
 
     elif command == "status":
         idx, task = get_current_task()
-        completed = sum(1 for t in tasks if t["status"] == "completed")
-        stuck = sum(1 for t in tasks if t["status"] == "stuck")
-        pending = sum(1 for t in tasks if t["status"] == "pending")
+        completed = _status_counts["completed"]
+        stuck = _status_counts["stuck"]
+        pending = _status_counts["pending"]
         print(f"\n--- Status ({args.project}) ---")
         print(f"  Completed: {completed}  In-progress: {1 if task else 0}  Pending: {pending}  Stuck: {stuck}")
         if task:
             print(f"  Current: [{task['id']}] {task['title']}")
-            print(f"  Attempts: {task['attempts']}/{config['tasks']['max_attempts_per_task']}")
+            print(f"  Attempts: {task['attempts']}/{max_attempts_per_task}")
         else:
             print("  No active task")
         print(f"  Paused: {_paused}")
@@ -590,7 +889,7 @@ def handle_command(cmd: str):
     elif command == "skip":
         idx, task = get_current_task()
         if task:
-            task["status"] = "stuck"
+            set_status(task, "stuck")
             save_tasks()
             print(f"  Skipped task {task['id']}: {task['title']}")
             next_idx, next_task = get_current_task()
@@ -643,24 +942,108 @@ def handle_command(cmd: str):
         interpret_natural_command(cmd)
 
 
+# Task saves are serialized on the caller's thread (a consistent snapshot) and
+# written by a background thread that keeps only the newest pending snapshot.
+_TASKS_SAVE_DEBOUNCE = 1.0
+_tasks_save_queue = queue.Queue()
+
+
+def _write_tasks_file(payload: bytes):
+    """Atomically replace tasks.json so a crash never leaves it half-written."""
+    tmp_path = tasks_path.with_suffix(".json.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, tasks_path)
+
+
+def _tasks_writer():
+    """Background thread that coalesces and writes queued task snapshots."""
+    while True:
+        payload = _tasks_save_queue.get()
+        if payload is None:
+            return
+        time.sleep(_TASKS_SAVE_DEBOUNCE)  # Let a burst of status flips coalesce
+        stopping = False
+        while True:
+            try:
+                newer = _tasks_save_queue.get_nowait()
+            except queue.Empty:
+                break
+            if newer is None:
+                stopping = True
+                break
+            payload = newer
+        try:
+            _write_tasks_file(payload)
+        except OSError as e:
+            logger.error(f"Failed to save tasks: {e}")
+        if stopping:
+            return
+
+
+_tasks_writer_thread = threading.Thread(target=_tasks_writer, daemon=True, name="tasks-writer")
+_tasks_writer_thread.start()
+
+
+_tasks_dirty = False
+
+
 def save_tasks():
-    """Persist task state back to file."""
-    with open(tasks_path, "w") as f:
-        json.dump(tasks_data, f, indent=2)
+    """Mark task state as changed; flush_tasks() persists it."""
+    global _tasks_dirty
+    _tasks_dirty = True
+
+
+def flush_tasks():
+    """Queue one snapshot of task state for writing, if it changed.
+
+    Runs after every FSM job, so several status flips within one handler
+    (e.g. complete, then assign the next task) cost a single serialization.
+    """
+    global _tasks_dirty
+    if _tasks_dirty:
+        _tasks_dirty = False
+        _tasks_save_queue.put(json_compat.dumps(tasks_data, indent=True))
+
+
+def stop_tasks_writer():
+    """Write any pending task state and stop the writer thread."""
+    flush_tasks()
+    _tasks_save_queue.put(None)
+    _tasks_writer_thread.join(timeout=5)
 
 
 def get_current_task():
     """Get the current pending or in-progress task."""
-    for i, task in enumerate(tasks):
-        if task["status"] in ("pending", "in_progress"):
-            return i, task
-    return None, None
+    global _current_task_cache, _current_task_dirty, _task_cursor
+    if _current_task_dirty:
+        while _task_cursor < len(tasks) and tasks[_task_cursor]["status"] in _TERMINAL_STATUSES:
+            _task_cursor += 1
+        _current_task_cache = next(
+            ((i, tasks[i]) for i in range(_task_cursor, len(tasks))
+             if tasks[i]["status"] in ("pending", "in_progress")),
+            (None, None),
+        )
+        _current_task_dirty = False
+    return _current_task_cache
+
+
+def _utc_timestamp(now: float) -> str:
+    """Format epoch seconds as YYYY-MM-DDTHH:MM:SSZ without strftime."""
+    t = time.gmtime(now)
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}Z"
+
+
+# Per-process message sequence, so two messages of the same type written in
+# the same second get distinct ids (and files) and still sort in write order
+_msg_seq = itertools.count(1)
 
 
 def write_to_mailbox(recipient: str, msg_type: str, content: dict):
     """Write a message directly to an agent's mailbox folder."""
-    timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    msg_id = f"orch-{int(time.time())}-{msg_type}"
+    now = time.time()
+    timestamp = _utc_timestamp(now)
+    msg_id = f"orch-{int(now)}-{next(_msg_seq):06d}-{msg_type}"
     message = {
         "id": msg_id,
         "from": "orchestrator",
@@ -671,38 +1054,90 @@ def write_to_mailbox(recipient: str, msg_type: str, content: dict):
         "read": False,
     }
 
-    target_dir = Path(mailbox_dir) / f"to_{recipient}"
-    target_dir.mkdir(parents=True, exist_ok=True)
+    target_dir = _mailbox_dirs[recipient]
     filepath = target_dir / f"{msg_id}.json"
-    filepath.write_text(json.dumps(message, indent=2))
+    # Write to a dot-file then rename, so watchers never see a partial message
+    tmp_path = target_dir / f".{msg_id}.json.tmp"
+    payload = json_compat.dumps(message)  # Read by the bridge, not by eye
+    try:
+        tmp_path.write_bytes(payload)
+    except FileNotFoundError:
+        # Mailbox was wiped while running (e.g. scripts/reset.sh)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(payload)
+    os.replace(tmp_path, filepath)
     logger.info(f"Wrote {msg_type} to {recipient}'s mailbox ({msg_id})")
     return message
 
 
+# (cache key, serialized JSON) for the task last rendered by build_context
+_task_json_cache = (None, None)
+
+
+def _task_json(task: dict) -> str:
+    """Serialize a task for the LLM context, reusing the last result if unchanged."""
+    global _task_json_cache
+    key = (id(task), task["status"], task["attempts"])
+    if _task_json_cache[0] != key:
+        _task_json_cache = (key, json_compat.dumps(task, indent=True).decode())
+    return _task_json_cache[1]
+
+
+# Static frame of the LLM decision context, specialised once at startup
+# (max attempts baked in); build_context only fills in the dynamic parts.
+_CONTEXT_TEMPLATE = """## Current State
+- Current task: %%s
+- Tasks remaining: %%d
+- Tasks completed: %%d
+- Task attempts: %%d/%d
+
+## Event
+Type: %%s
+Data: %%s
+
+## Recent Message History
+%%s
+
+## What should happen next?""" % max_attempts_per_task
+
+
 def build_context(event_type: str, event_data: dict) -> str:
     """Build context string for the LLM decision."""
     idx, current_task = get_current_task()
-    remaining = sum(1 for t in tasks if t["status"] == "pending")
-    completed = sum(1 for t in tasks if t["status"] == "completed")
-    history = mailbox.get_conversation_history()
-    recent_history = history[-6:]
+    recent_history = mailbox.get_recent_history(6)
+
+    return _CONTEXT_TEMPLATE % (
+        _task_json(current_task) if current_task else "None",
+        _status_counts["pending"],
+        _status_counts["completed"],
+        current_task["attempts"] if current_task else 0,
+        event_type,
+        json_compat.dumps(event_data, indent=True).decode(),
+        json_compat.dumps(recent_history, indent=True).decode() if recent_history else "No messages yet.",
+    )
 
-    context = f"""## Current State
-- Current task: {json.dumps(current_task, indent=2) if current_task else "None"}
-- Tasks remaining: {remaining}
-- Tasks completed: {completed}
-- Task attempts: {current_task['attempts'] if current_task else 0}/{config['tasks']['max_attempts_per_task']}
 
-## Event
-Type: {event_type}
-Data: {json.dumps(event_data, indent=2)}
+# The three worktrees are independent checkouts, so branch prep runs in parallel.
+_git_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="git")
 
-## Recent Message History
-{json.dumps(recent_history, indent=2) if recent_history else "No messages yet."}
 
-## What should happen next?"""
+def _prepare_task_branch(wt_dir: str, branch: str) -> tuple[bool, str, str]:
+    """Check out branch in wt_dir, creating it from the default branch if needed.
 
-    return context
+    Returns (success, action, git output).
+    """
+    if branch_exists(wt_dir, branch):
+        # Branch exists -- just check it out (e.g., resuming after restart)
+        success, output = run_git_command(wt_dir, "checkout", branch, quiet=True)
+        return success, "checkout", output
+    # New task -- create the task branch from the default branch and
+    # check it out in one git call
+    success, output = run_git_command(wt_dir, "checkout", "-b", branch, default_branch, quiet=True)
+    if not success:
+        # Fall back to step by step so the failing step is logged
+        run_git_command(wt_dir, "checkout", default_branch, quiet=True)
+        success, output = run_git_command(wt_dir, "checkout", "-b", branch)
+    return success, "create", output
 
 
 def create_task_branches(task_id: str):
@@ -713,33 +1148,35 @@ def create_task_branches(task_id: str):
     """
     if not repo_dir:
         return
-    agents_cfg = config.get("agents", {})
     branch_map = {
         "qa": f"red/{task_id}",
         "dev": f"green/{task_id}",
         "refactor": f"blue/{task_id}",
     }
+    futures = {}
     for agent, branch in branch_map.items():
-        wt_dir = agents_cfg.get(agent, {}).get("working_dir", "")
+        wt_dir = _agent_working_dirs.get(agent, "")
         if not wt_dir:
             continue
-        # Check if branch already exists (quiet -- expected to fail for new tasks)
-        exists, _ = run_git_command(wt_dir, "rev-parse", "--verify", branch, quiet=True)
-        if exists:
-            # Branch exists -- just check it out (e.g., resuming after restart)
-            success, output = run_git_command(wt_dir, "checkout", branch, quiet=True)
+        future = _git_executor.submit(_prepare_task_branch, wt_dir, branch)
+        futures[future] = (agent, branch)
+
+    for future in as_completed(futures):
+        agent, branch = futures[future]
+        try:
+            success, action, output = future.result()
+        except Exception as e:
+            logger.error(f"Branch prep for {branch} in {agent} worktree failed: {e}")
+            continue
+        if action == "checkout":
             if success:
                 logger.info(f"Checked out existing {branch} in {agent} worktree")
             else:
                 logger.warning(f"Failed to checkout existing {branch} in {agent}: {output}")
+        elif success:
+            logger.info(f"Created {branch} from {default_branch} in {agent} worktree")
         else:
-            # New task -- checkout default branch first, then create task branch
-            run_git_command(wt_dir, "checkout", default_branch, quiet=True)
-            success, output = run_git_command(wt_dir, "checkout", "-b", branch)
-            if success:
-                logger.info(f"Created {branch} from {default_branch} in {agent} worktree")
-            else:
-                logger.warning(f"Failed to create {branch} in {agent}: {output}")
+            logger.warning(f"Failed to create {branch} in {agent}: {output}")
 
 
 def assign_task_to_qa(task: dict):
@@ -748,8 +1185,7 @@ def assign_task_to_qa(task: dict):
 
     # Clear agent contexts for new tasks (pane readiness checked by tmux_nudge)
     if current_task_id is not None and current_task_id != task["id"]:
-        for agent in ("qa", "dev", "refactor"):
-            tmux_clear(agent)
+        tmux_clear("qa", "dev", "refactor")
 
     current_task_id = task["id"]
     create_task_branches(task["id"])
@@ -803,7 +1239,7 @@ def assign_task_to_qa(task: dict):
 
     write_to_mailbox("qa", "task_assignment", content)
     tmux_nudge("qa")
-    task["status"] = "in_progress"
+    set_status(task, "in_progress")
     save_tasks()
     rgr_state = RGRState.WAITING_QA_RED
     logger.info(f"Assigned task {task['id']} to QA ({phase_label})")
@@ -822,7 +1258,7 @@ def handle_qa_message(message: dict):
     task_id = current_task_id or task["id"]
 
     # Merge red/<task> branch into Dev worktree
-    dev_dir = config.get("agents", {}).get("dev", {}).get("working_dir", "")
+    dev_dir = _agent_working_dirs.get("dev", "")
     if repo_dir and dev_dir:
         red_branch = f"red/{task_id}"
         logger.info(f"Merging {red_branch} into Dev worktree...")
@@ -831,9 +1267,11 @@ def handle_qa_message(message: dict):
             rgr_state = RGRState.BLOCKED
             _blocked_context = ("red_to_dev", task, content)
             logger.error(f"Failed to merge {red_branch} into Dev: {output}")
-            print(f"\nBLOCKED: Git merge failed ({red_branch} -> Dev)")
-            print(f"  {output}")
-            print(f"  Resolve manually in {dev_dir} then type 'resume'\n")
+            sys.stdout.write(
+                f"\nBLOCKED: Git merge failed ({red_branch} -> Dev)\n"
+                f"  {output}\n"
+                f"  Resolve manually in {dev_dir} then type 'resume'\n\n"
+            )
             return
         logger.info(f"Merged {red_branch} into Dev worktree successfully")
         log_file_changes(task_id, "red", dev_dir, red_branch)
@@ -889,7 +1327,7 @@ def handle_dev_message(message: dict):
     task_id = current_task_id or task["id"]
 
     # Merge green/<task> branch into Refactor worktree
-    refactor_dir = config.get("agents", {}).get("refactor", {}).get("working_dir", "")
+    refactor_dir = _agent_working_dirs.get("refactor", "")
     if repo_dir and refactor_dir:
         green_branch = f"green/{task_id}"
         logger.info(f"Merging {green_branch} into Refactor worktree...")
@@ -898,9 +1336,11 @@ def handle_dev_message(message: dict):
             rgr_state = RGRState.BLOCKED
             _blocked_context = ("green_to_refactor", task, content)
             logger.error(f"Failed to merge {green_branch} into Refactor: {output}")
-            print(f"\nBLOCKED: Git merge failed ({green_branch} -> Refactor)")
-            print(f"  {output}")
-            print(f"  Resolve manually in {refactor_dir} then type 'resume'\n")
+            sys.stdout.write(
+                f"\nBLOCKED: Git merge failed ({green_branch} -> Refactor)\n"
+                f"  {output}\n"
+                f"  Resolve manually in {refactor_dir} then type 'resume'\n\n"
+            )
             return
         logger.info(f"Merged {green_branch} into Refactor worktree successfully")
         log_file_changes(task_id, "green", refactor_dir, green_branch)
@@ -943,6 +1383,39 @@ def handle_dev_message(message: dict):
     log_to_report(f"**Dev (GREEN) complete: {task['id']}**\n\n{content.get('summary', 'No summary')}\n")
 
 
+# Refactor result statuses that map to a fixed decision without asking the LLM
+_PASS_STATUSES = frozenset(("pass", "passed", "success"))
+_FAIL_STATUSES = frozenset(("fail", "failed", "bugs_found"))
+_decision_stats = {"rules": 0, "llm": 0}
+
+
+def _record_decision(source: str):
+    """Count whether a refactor result was resolved by rules or by the LLM."""
+    _decision_stats[source] += 1
+    total = _decision_stats["rules"] + _decision_stats["llm"]
+    logger.info(
+        f"Decision via {source} (rules: {_decision_stats['rules']}, llm: {_decision_stats['llm']}, "
+        f"fast-path {100 * _decision_stats['rules'] // total}%)"
+    )
+
+
+def _plan_refactor_result(status: str, task: dict):
+    """Deterministic decision table for a Refactor result.
+
+    Returns "pass", "fix", "stuck" or "flag_human", or None when the status
+    is ambiguous and the LLM has to decide.
+    """
+    normalized = str(status).strip().lower()
+    exhausted = task["attempts"] >= max_attempts_per_task
+    if normalized in _PASS_STATUSES:
+        return "pass"
+    if normalized in _FAIL_STATUSES:
+        return "stuck" if exhausted else "fix"
+    if exhausted:
+        return "flag_human"
+    return None
+
+
 def handle_refactor_message(message: dict):
     """Handle message from Refactor: cleanup done -> merge into main or retry."""
     global rgr_state
@@ -951,11 +1424,24 @@ def handle_refactor_message(message: dict):
         logger.warning("Received Refactor message but no active task")
         return
 
-    task["attempts"] += 1
     content = message.get("content", {})
     status = content.get("status", "unknown")
 
-    if status == "pass":
+    # The LLM is still deciding this very attempt: another ambiguous status
+    # adds nothing, so don't count it as an attempt or a decision
+    pending = _pending_decisions.get(task["id"])
+    if pending and pending[1] == _decision_tag(task) \
+            and str(status).strip().lower() not in _PASS_STATUSES | _FAIL_STATUSES:
+        logger.info(f"LLM decision for {task['id']} already pending -- ignoring refactor status '{status}'")
+        return
+
+    task["attempts"] += 1
+
+    # Resolve the common cases from the table before building any LLM context
+    plan = _plan_refactor_result(status, task)
+    _record_decision("rules" if plan else "llm")
+
+    if plan == "pass":
         task_id = current_task_id or task["id"]
 
         # Merge blue/<task> into default branch
@@ -969,14 +1455,16 @@ def handle_refactor_message(message: dict):
                 rgr_state = RGRState.BLOCKED
                 _blocked_context = ("blue_to_main", task, content)
                 logger.error(f"Failed to merge {blue_branch} into {default_branch}: {output}")
-                print(f"\nBLOCKED: Git merge into {default_branch} failed ({blue_branch})")
-                print(f"  {output}")
-                print(f"  Resolve manually in {repo_dir} then type 'resume'\n")
+                sys.stdout.write(
+                    f"\nBLOCKED: Git merge into {default_branch} failed ({blue_branch})\n"
+                    f"  {output}\n"
+                    f"  Resolve manually in {repo_dir} then type 'resume'\n\n"
+                )
                 return
             logger.info(f"Merged {blue_branch} into {default_branch} successfully")
 
         # Refactor succeeded -- task complete
-        task["status"] = "completed"
+        set_status(task, "completed")
         save_tasks()
         rgr_state = RGRState.IDLE
         logger.info(f"Task {task['id']} COMPLETED (RGR cycle done)")
@@ -989,46 +1477,110 @@ def handle_refactor_message(message: dict):
         else:
             _notify_all_done()
 
-    elif status == "fail":
+    elif plan == "stuck":
+        # Refactor broke tests and attempts are used up
+        logger.warning(f"Task {task['id']} exceeded max attempts")
+        set_status(task, "stuck")
+        save_tasks()
+        rgr_state = RGRState.IDLE
+        sys.stdout.write(
+            f"\nHUMAN REVIEW NEEDED: Task {task['id']} - {task['title']}\n"
+            f"   Failed {task['attempts']} times. Check orchestrator.log.\n\n"
+        )
+        log_to_report(f"**TASK STUCK: {task['id']}** -- exceeded max attempts ({task['attempts']})\n")
+
+    elif plan == "fix":
         # Refactor broke tests -- send back to Dev
-        if task["attempts"] >= config["tasks"]["max_attempts_per_task"]:
-            logger.warning(f"Task {task['id']} exceeded max attempts")
-            task["status"] = "stuck"
-            save_tasks()
-            rgr_state = RGRState.IDLE
-            print(f"\nHUMAN REVIEW NEEDED: Task {task['id']} - {task['title']}")
-            print(f"   Failed {task['attempts']} times. Check orchestrator.log.\n")
-            log_to_report(f"**TASK STUCK: {task['id']}** -- exceeded max attempts ({task['attempts']})\n")
-        else:
-            write_to_mailbox("dev", "fix_required", {
-                "task_id": task["id"],
-                "message": "Refactor broke tests. Fix the issues and re-send to refactor.",
-                "issues": content.get("issues", ""),
-                "instructions": (
-                    "The Refactor agent's changes broke the tests. Fix the code so tests "
-                    "pass again, then commit and use send_to_refactor to hand off for another attempt."
-                ),
-            })
-            tmux_nudge("dev")
-            rgr_state = RGRState.WAITING_DEV_GREEN
-            logger.info(f"Task {task['id']} attempt {task['attempts']} - refactor failed, back to Dev")
+        write_to_mailbox("dev", "fix_required", {
+            "task_id": task["id"],
+            "message": "Refactor broke tests. Fix the issues and re-send to refactor.",
+            "issues": content.get("issues") or content.get("bugs", ""),
+            "instructions": (
+                "The Refactor agent's changes broke the tests. Fix the code so tests "
+                "pass again, then commit and use send_to_refactor to hand off for another attempt."
+            ),
+        })
+        tmux_nudge("dev")
+        rgr_state = RGRState.WAITING_DEV_GREEN
+        logger.info(f"Task {task['id']} attempt {task['attempts']} - refactor failed, back to Dev")
+
+    elif plan == "flag_human":
+        # Unknown status with no attempts left -- no point asking the LLM
+        _apply_refactor_decision(task, {
+            "action": "flag_human",
+            "message": f"Task {task['id']} exceeded max attempts ({task['attempts']}) "
+                       f"with refactor status '{status}'",
+        })
 
     else:
-        # Unknown status -- ask LLM
+        # Unknown status -- ask the LLM off the FSM worker, so other messages
+        # and commands keep flowing; the decision is applied back on the worker
         context = build_context("refactor_results", {
             "status": status,
             "summary": content.get("summary", ""),
         })
-        decision = llm.decide(context)
-        action = decision.get("action", "flag_human")
+        future = _decide_in_background(context)
+        tag = _decision_tag(task)
+        _pending_decisions[task["id"]] = (future, tag, message)
+        future.add_done_callback(lambda f: _dispatch_decision(task, f, tag, message))
+
+
+def _decision_tag(task: dict) -> tuple:
+    """What an LLM decision was asked about; it is stale once this changes."""
+    return task["attempts"], task["status"]
+
+
+def _decide_in_background(context: str) -> Future:
+    """Run llm.decide(context) on a daemon thread, so exit never waits on Ollama."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(llm.decide(context))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True, name="llm").start()
+    return future
+
+
+def _dispatch_decision(task: dict, future, tag: tuple, message: dict):
+    """Done-callback for an LLM decision: hand it back to the FSM worker."""
+    if not _stopping:
+        _dispatch(_finish_llm_decision, task, future, tag, message)
+
+
+def _finish_llm_decision(task: dict, future, tag: tuple, message: dict):
+    """Apply a completed LLM decision if its task hasn't moved on since it was asked.
+
+    The refactor message is only logged as processed here, so a decision
+    still pending at shutdown is asked again next run.
+    """
+    if _pending_decisions.get(task["id"], (None,))[0] is future:
+        del _pending_decisions[task["id"]]
+    if _stopping:
+        return
+    try:
+        if get_current_task()[1] is not task or _decision_tag(task) != tag:
+            logger.info(f"Dropping stale LLM decision for {task['id']} (task moved on while it was pending)")
+            return
+        _apply_refactor_decision(task, future.result())
+    finally:
+        mailbox.mark_handled(message)
 
-        if action == "flag_human":
-            task["status"] = "stuck"
-            save_tasks()
-            rgr_state = RGRState.IDLE
-            msg = decision.get("message", "Unknown issue")
-            print(f"\nHUMAN REVIEW NEEDED: {msg}\n")
-            logger.warning(f"Flagged for human: {msg}")
+
+def _apply_refactor_decision(task: dict, decision: dict):
+    """Act on an LLM (or rule-made) decision for an unrecognized refactor status."""
+    global rgr_state
+    action = decision.get("action", "flag_human")
+
+    if action == "flag_human":
+        set_status(task, "stuck")
+        save_tasks()
+        rgr_state = RGRState.IDLE
+        msg = decision.get("message", "Unknown issue")
+        print(f"\nHUMAN REVIEW NEEDED: {msg}\n")
+        logger.warning(f"Flagged for human: {msg}")
 
 
 _all_done_notified = False
@@ -1041,8 +1593,8 @@ def _notify_all_done():
         return
     _all_done_notified = True
 
-    completed = sum(1 for t in tasks if t["status"] == "completed")
-    stuck = sum(1 for t in tasks if t["status"] == "stuck")
+    completed = _status_counts["completed"]
+    stuck = _status_counts["stuck"]
     total = len(tasks)
 
     banner = f"ALL {completed}/{total} TASKS COMPLETED"
@@ -1050,9 +1602,8 @@ def _notify_all_done():
         banner += f" ({stuck} stuck)"
 
     # Print banner to ORCH pane
-    print(f"\n{'=' * 50}")
-    print(f"  {banner}")
-    print(f"{'=' * 50}\n")
+    rule = "=" * 50
+    sys.stdout.write(f"\n{rule}\n  {banner}\n{rule}\n\n")
 
     logger.info(banner)
     log_to_report(f"**{banner}**\n")
@@ -1071,14 +1622,107 @@ def _notify_all_done():
     # Terminal bell (iTerm2 will badge/bounce)
     print("\a", end="", flush=True)
 
-    # Notify agents
+    # Notify agents: write all mailboxes first, then nudge
     for agent in ("qa", "dev", "refactor"):
         write_to_mailbox(agent, "all_done", {"message": "All tasks complete! Great work."})
-        tmux_nudge(agent)
+    tmux_nudge_batch(("qa", "dev", "refactor"))
+
+
+def _check_all_done():
+    """Notify once every task has finished (completed or stuck)."""
+    global _status_changed
+    _status_changed = False
+    completed = _status_counts["completed"]
+    if completed and completed + _status_counts["stuck"] == len(tasks):
+        _notify_all_done()
+
+
+# --- FSM worker ---
+# Message handlers and commands block on git merges, tmux and the LLM. They
+# run on a single worker thread so the polling loop stays responsive, while
+# FIFO execution keeps them ordered and serialized over the shared FSM state.
+# It is a daemon thread rather than an executor, whose workers the interpreter
+# joins at exit: shutdown gives a running handler only a short grace period.
+_FSM_SHUTDOWN_GRACE = 5.0
+_fsm_queue = queue.Queue()
+
+
+# LLM decisions running off the FSM worker: task id -> (Future, tag, message)
+_pending_decisions = {}
+# Set once main() starts shutting down; late LLM decisions are discarded
+_stopping = False
+
+
+def _run_logged(fn, *fn_args):
+    try:
+        fn(*fn_args)
+        if _status_changed:
+            # All-done can only become true right after a status change
+            _check_all_done()
+    except Exception as e:
+        logger.error(f"{fn.__name__} failed: {e}", exc_info=True)
+    finally:
+        flush_tasks()
+
+
+def _fsm_worker():
+    """Run queued FSM handlers one at a time until a None sentinel."""
+    while True:
+        job = _fsm_queue.get()
+        if job is None:
+            return
+        _run_logged(*job)
+
+
+_fsm_thread = threading.Thread(target=_fsm_worker, daemon=True, name="fsm")
+_fsm_thread.start()
+
+
+def _handle_message(handler, message: dict):
+    """Run a mailbox message handler, then log the message as processed.
+
+    A message still queued (or mid-handler) when the process stops is thus
+    read again on the next run instead of being lost.
+    """
+    try:
+        handler(message)
+    finally:
+        # An LLM decision on it logs it once applied (_finish_llm_decision)
+        if not any(pending[2] is message for pending in _pending_decisions.values()):
+            mailbox.mark_handled(message)
+
+
+def _dispatch(fn, *fn_args):
+    """Queue an FSM handler on the worker thread."""
+    _fsm_queue.put((fn, *fn_args))
+
+
+def stop_fsm_worker():
+    """Drop queued handlers and wait briefly for the running one to finish.
+
+    Messages of dropped handlers were never marked handled, so the next run
+    reads them again.
+    """
+    while True:
+        try:
+            _fsm_queue.get_nowait()
+        except queue.Empty:
+            break
+    _fsm_queue.put(None)
+    _fsm_thread.join(timeout=_FSM_SHUTDOWN_GRACE)
+    if _fsm_thread.is_alive():
+        logger.warning(f"FSM handler still running after {_FSM_SHUTDOWN_GRACE}s -- exiting without it")
+
+
+def _handle_stop_signal(signum, frame):
+    """Turn SIGTERM/SIGHUP into a normal exit, so main()'s cleanup flushes tasks."""
+    logger.info(f"Received {signal.Signals(signum).name} -- shutting down")
+    raise SystemExit(0)
 
 
 def main():
     """Main orchestrator loop."""
+    global _tmux_ok, _stopping
     logger.info("=" * 60)
     logger.info(f"RGR Orchestrator Starting — project: {args.project}")
     logger.info("=" * 60)
@@ -1088,7 +1732,10 @@ def main():
         logger.error("Ollama is not running or model not available!")
         logger.error(f"   Run: ollama pull {config['llm']['model']}")
         sys.exit(1)
-    logger.info(f"LLM ready ({config['llm']['model']})")
+    if llm.preload():
+        logger.info(f"LLM ready ({config['llm']['model']}, kept loaded for {llm.keep_alive})")
+    else:
+        logger.info(f"LLM ready ({config['llm']['model']})")
     logger.info(f"Project mode: {project_mode}")
     logger.info(f"Mailbox dir: {mailbox_dir}")
 
@@ -1105,8 +1752,9 @@ def main():
     else:
         logger.warning("No repo_dir configured — git operations disabled")
 
-    # Pre-flight: check tmux session
-    if check_tmux_session():
+    # Pre-flight: check tmux session (nudges are skipped until it exists)
+    _tmux_ok = check_tmux_session()
+    if _tmux_ok:
         logger.info(f"tmux session '{tmux_session}' detected — nudges enabled")
     else:
         logger.warning(f"tmux session '{tmux_session}' not found — nudges will be skipped")
@@ -1116,76 +1764,146 @@ def main():
     if first_task:
         logger.info(f"Starting with task: {first_task['title']}")
         assign_task_to_qa(first_task)
+        flush_tasks()
     else:
         logger.info("No pending tasks found — waiting for new tasks or commands")
+        _dispatch(_check_all_done)  # Every task may have finished in an earlier run
 
-    # Start interactive command reader
-    cmd_thread = threading.Thread(target=_stdin_reader, daemon=True)
-    cmd_thread.start()
+    # Wait on mailbox events and console input together
+    selector = selectors.DefaultSelector()
+    selector.register(mailbox, selectors.EVENT_READ)
+    pending_cmds = []
+    if sys.stdin is not None:
+        try:
+            selector.register(sys.stdin, selectors.EVENT_READ)
+        except (ValueError, OSError):
+            # Not pollable (e.g. redirected from a regular file). Such
+            # stdin never blocks, so read all of its commands up front.
+            try:
+                while (lines := _read_stdin_commands()) is not None:
+                    pending_cmds += lines
+            except OSError as e:
+                logger.warning(f"Console input unavailable: {e}")
 
     # Main polling loop
+    # Adaptive interval: reset to poll_interval on activity, back off
+    # geometrically up to max_interval while idle.
     poll_interval = config["polling"]["interval_seconds"]
-    logger.info(f"Polling mailbox every {poll_interval}s...")
+    max_interval = max(poll_interval, config["polling"].get("max_interval_seconds", 30))
+    backoff = config["polling"].get("backoff_factor", 1.5)
+    current_interval = poll_interval
+    logger.info(f"Polling mailbox every {poll_interval}s (backing off to {max_interval}s when idle)...")
     logger.info("Agents will be nudged via tmux when new messages arrive.")
     logger.info("Type 'help' for interactive commands.")
     logger.info("")
 
+    # Mailboxes to scan this tick: None scans all three (startup and
+    # fallback-poll ticks); after a file event only the ones that changed
+    changed = None
+    # Closing the tmux pane sends SIGHUP; kill/systemd send SIGTERM
+    for sig in (signal.SIGTERM, getattr(signal, "SIGHUP", None)):
+        if sig is not None:
+            signal.signal(sig, _handle_stop_signal)
     try:
         while True:
+            active = False
+
             # Process any queued commands
-            while not _cmd_queue.empty():
-                try:
-                    cmd = _cmd_queue.get_nowait()
-                    handle_command(cmd)
-                except queue.Empty:
-                    break
+            for cmd in pending_cmds:
+                _dispatch(handle_command, cmd)
+                active = True
+            pending_cmds.clear()
 
             # Skip mailbox polling if paused
             if not _paused:
+                found = mailbox.check_new_messages_batch(
+                    [r for r in ("qa", "dev", "refactor") if changed is None or r in changed]
+                )
+                qa_msgs = found.get("qa", [])
+                dev_msgs = found.get("dev", [])
+                ref_msgs = found.get("refactor", [])
+                if qa_msgs or dev_msgs or ref_msgs:
+                    active = True
+
+                # Hot-path logging below uses lazy %-style args (nothing is
+                # formatted when the level is filtered) and .get() so a
+                # malformed message can't raise in the main loop.
+
+                # Messages that need no handler; the rest are logged as
+                # processed by _handle_message once their handler has run
+                skipped = list(qa_msgs)
+
                 # Check QA's mailbox -- messages from Dev (code ready for testing)
                 # In RGR, QA mailbox receives task assignments from orchestrator
-                for qa_msg in mailbox.check_new_messages("qa"):
+                for qa_msg in qa_msgs:
                     if qa_msg.get("from") != "orchestrator":
-                        logger.info(f"Message in QA mailbox from {qa_msg.get('from')}: {qa_msg['type']}")
+                        logger.debug("Message in QA mailbox from %s: %s", qa_msg.get("from"), qa_msg.get("type"))
 
                 # Check Dev's mailbox -- messages from QA (tests) or Refactor (results)
-                for dev_msg in mailbox.check_new_messages("dev"):
+                for dev_msg in dev_msgs:
                     sender = dev_msg.get("from", "")
                     if sender == "orchestrator":
-                        continue
+                        skipped.append(dev_msg)
                     elif sender == "qa":
-                        logger.info(f"QA sent tests: {dev_msg['type']}")
-                        handle_qa_message(dev_msg)
+                        logger.info("QA sent tests: %s", dev_msg.get("type"))
+                        _dispatch(_handle_message, handle_qa_message, dev_msg)
                     elif sender == "refactor":
-                        logger.info(f"Refactor sent results: {dev_msg['type']}")
-                        handle_refactor_message(dev_msg)
+                        logger.info("Refactor sent results: %s", dev_msg.get("type"))
+                        _dispatch(_handle_message, handle_refactor_message, dev_msg)
                     else:
-                        logger.info(f"Unknown sender '{sender}' in Dev mailbox: {dev_msg['type']}")
+                        logger.info("Unknown sender '%s' in Dev mailbox: %s", sender, dev_msg.get("type"))
+                        skipped.append(dev_msg)
 
                 # Check Refactor's mailbox -- messages from Dev (code ready for refactoring)
-                for ref_msg in mailbox.check_new_messages("refactor"):
+                for ref_msg in ref_msgs:
                     sender = ref_msg.get("from", "")
                     if sender == "orchestrator":
-                        continue
+                        skipped.append(ref_msg)
                     elif sender == "dev":
-                        logger.info(f"Dev sent code to refactor: {ref_msg['type']}")
-                        handle_dev_message(ref_msg)
+                        logger.info("Dev sent code to refactor: %s", ref_msg.get("type"))
+                        _dispatch(_handle_message, handle_dev_message, ref_msg)
                     else:
-                        logger.info(f"Message in Refactor mailbox from {sender}: {ref_msg['type']}")
+                        logger.debug("Message in Refactor mailbox from %s: %s", sender, ref_msg.get("type"))
+                        skipped.append(ref_msg)
+                if skipped:
+                    mailbox.mark_handled(*skipped)
 
-                # Check if all tasks done
-                all_done = all(
-                    t["status"] in ("completed", "stuck") for t in tasks
-                )
-                if all_done and any(t["status"] == "completed" for t in tasks):
-                    _notify_all_done()
+                changed = set()
 
-            time.sleep(poll_interval)
+            if active:
+                current_interval = poll_interval
+            else:
+                current_interval = min(max_interval, current_interval * backoff)
+            # Wake on mailbox file events or console input; the timeout is
+            # the fallback poll (network filesystems, missing watchdog).
+            ready = selector.select(timeout=current_interval)
+            if not ready:
+                changed = None
+            for key, _ in ready:
+                if key.fileobj is mailbox:
+                    mailbox.drain_events()
+                    touched = mailbox.take_changed()
+                    if changed is not None:
+                        changed |= touched
+                else:
+                    lines = _read_stdin_commands()
+                    if lines is None:
+                        selector.unregister(sys.stdin)
+                    else:
+                        pending_cmds += lines
 
     except KeyboardInterrupt:
         logger.info("Orchestrator stopped by user")
     except Exception as e:
         logger.error(f"Orchestrator crashed: {e}", exc_info=True)
+    finally:
+        _stopping = True
+        stop_fsm_worker()
+        stop_tasks_writer()
+        _git_executor.shutdown(wait=False, cancel_futures=True)
+        mailbox.stop()
+        llm.close()
+        _tmux_control.close()
 
 
 if __name__ == "__main__":
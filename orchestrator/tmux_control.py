@@ -0,0 +1,137 @@
+"""Persistent tmux control-mode client.
+
+Keeps one ``tmux -C attach`` process open and writes commands to its stdin,
+so sending keys to a pane is a pipe write instead of a fresh tmux process.
+Callers fall back to the tmux CLI when ``run`` returns None.
+"""
+
+import logging
+import queue
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before trying to re-attach after a failure
+_RECONNECT_DELAY = 30.0
+
+
+def _quote(arg: str) -> str:
+    """Quote an argument for the tmux command parser (no expansion inside '')."""
+    return "'" + arg.replace("'", "'\\''") + "'"
+
+
+class TmuxControlClient:
+    def __init__(self, session: str):
+        self.session = session
+        self._proc = None
+        self._reader = None
+        self._replies = queue.Queue()
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def _connect(self) -> bool:
+        """Attach a control-mode client to the session."""
+        if self._proc is not None and self._proc.poll() is None:
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        self._replies = queue.Queue()
+        try:
+            # no-output: don't stream pane output; ignore-size: don't resize windows
+            self._proc = subprocess.Popen(
+                ["tmux", "-C", "attach-session", "-t", self.session, "-f", "no-output,ignore-size"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                text=True, bufsize=1,
+            )
+        except OSError as e:
+            logger.debug(f"tmux control mode unavailable: {e}")
+            self._proc = None
+            self._retry_at = time.monotonic() + _RECONNECT_DELAY
+            return False
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(self._proc, self._replies),
+            daemon=True, name="tmux-control",
+        )
+        self._reader.start()
+        logger.debug(f"Attached tmux control client to {self.session}")
+        return True
+
+    @staticmethod
+    def _read_loop(proc, replies):
+        """Collect %begin/%end blocks for our commands; drop notifications."""
+        block = None
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if block is None:
+                # Flag 1 marks replies to commands sent by this client;
+                # the implicit attach-session reply has flag 0.
+                if line.startswith("%begin ") and line.endswith(" 1"):
+                    block = []
+            elif line.startswith(("%end ", "%error ")):
+                replies.put((line.startswith("%end "), "\n".join(block)))
+                block = None
+            else:
+                block.append(line)
+        replies.put(None)  # Client exited
+
+    def run(self, *commands: list[str], timeout: float = 5.0):
+        """Run tmux commands (one arg list each) as a single command line.
+
+        Returns a CompletedProcess like ``subprocess.run`` would, or None if
+        control mode is unavailable and the caller should use the CLI.
+        """
+        with self._lock:
+            if not self._connect():
+                return None
+            line = " ; ".join(" ".join(_quote(a) for a in cmd) for cmd in commands)
+            try:
+                self._proc.stdin.write(line + "\n")
+                self._proc.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                logger.debug(f"tmux control client write failed: {e}")
+                self._drop()
+                return None
+
+            returncode, out, err = 0, [], []
+            deadline = time.monotonic() + timeout
+            for _ in commands:
+                try:
+                    reply = self._replies.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    # Replies would arrive out of step from here on
+                    self._drop()
+                    raise subprocess.TimeoutExpired(["tmux", "-C"], timeout)
+                if reply is None:
+                    self._drop()
+                    return None
+                ok, text = reply
+                if not ok:
+                    # tmux skips the rest of a ;-line after an error, so no
+                    # more replies are coming for it
+                    returncode = 1
+                    err.append(text)
+                    break
+                out.append(text)
+            return subprocess.CompletedProcess(
+                ["tmux", "-C"], returncode, "\n".join(filter(None, out)), "\n".join(err),
+            )
+
+    def _drop(self):
+        """Tear down a broken client and back off before re-attaching."""
+        self._retry_at = time.monotonic() + _RECONNECT_DELAY
+        self.close()
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
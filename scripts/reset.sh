@@ -73,6 +73,7 @@ if [[ -d "$MAILBOX_DIR" ]]; then
     rm -f "$MAILBOX_DIR/to_dev/"*.json 2>/dev/null || true
     rm -f "$MAILBOX_DIR/to_qa/"*.json 2>/dev/null || true
     rm -f "$MAILBOX_DIR/to_refactor/"*.json 2>/dev/null || true
+    rm -f "$MAILBOX_DIR/.processed.log" 2>/dev/null || true
     success "Mailboxes cleared"
 fi
 
@@ -0,0 +1,166 @@
+#!/bin/bash
+# Test script: LLM decision helpers
+# 1. _JsonObjectScanner spots the end of the first JSON object across chunks
+# 2. A streamed Ollama response is cut off once the decision JSON closes
+# 3. The refactor decision table resolves known statuses without the LLM
+set -e
+
+BOLD=$(tput bold) RESET=$(tput sgr0)
+GREEN=$(tput setaf 2) RED=$(tput setaf 1)
+pass() { echo "  ${GREEN}PASS${RESET} $*"; }
+fail() { echo "  ${RED}FAIL${RESET} $*"; FAILURES=$((FAILURES + 1)); }
+FAILURES=0
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+ROOT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+# Run python from the orchestrator directory so its modules import
+orch_py() {
+    (cd "$ROOT_DIR/orchestrator" && python3 -c "$1" 2>/dev/null)
+}
+
+echo ""
+echo "  ${BOLD}Testing LLM decision helpers${RESET}"
+echo "  ============================"
+echo ""
+
+# ─── Test 1: JSON object scanner ────────────────────────────────────────────
+echo "  ${BOLD}Test 1: JSON object scanner${RESET}"
+
+# Each case prints the index of the chunk that completed the object, or -1
+RESULT=$(orch_py '
+from llm_client import _JsonObjectScanner
+
+def done_at(chunks):
+    scanner = _JsonObjectScanner()
+    for i, chunk in enumerate(chunks):
+        if scanner.feed(chunk):
+            return i
+    return -1
+
+print(
+    done_at(["{\"action\": \"a", "}\", ", "\"n\": {\"x\": 1}", "}", " trailing"]),
+    done_at(["<thi", "nk>{ {", "</think>", "{\"m\": \"say \\\"}\\\"\"}"]),
+    done_at(["Sure: ", "{\"action\": \"next_task\"", " "]),
+)
+') || true
+read -r NESTED THINK OPEN <<< "$RESULT"
+
+if [[ "$NESTED" == "3" ]]; then
+    pass "Nested object and braces in strings tracked across chunks"
+else
+    fail "Nested object completed at chunk $NESTED, expected 3"
+fi
+
+if [[ "$THINK" == "3" ]]; then
+    pass "Braces in a split <think> block and escaped quotes ignored"
+else
+    fail "Object after <think> completed at chunk $THINK, expected 3"
+fi
+
+if [[ "$OPEN" == "-1" ]]; then
+    pass "Unclosed object not reported as complete"
+else
+    fail "Unclosed object reported complete at chunk $OPEN"
+fi
+
+echo ""
+
+# ─── Test 2: stream cut off early ───────────────────────────────────────────
+echo "  ${BOLD}Test 2: Streamed response cut off at the end of the JSON${RESET}"
+
+# A fake Ollama server streams the decision, then more tokens it records
+# as sent; the client should hang up before reading them
+RESULT=$(orch_py '
+import http.server, json, threading, time
+from llm_client import OllamaClient
+
+sent = []
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        tokens = ["{\"action\": ", "\"next_task\"}"] + [" more"] * 50
+        try:
+            for token in tokens:
+                self.wfile.write((json.dumps({"response": token, "done": False}) + "\n").encode())
+                self.wfile.flush()
+                sent.append(token)
+                time.sleep(0.02)
+            self.wfile.write((json.dumps({"response": "", "done": True}) + "\n").encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+client = OllamaClient(base_url=f"http://127.0.0.1:{server.server_port}")
+text = client._generate("system", "prompt", client._options(64))
+time.sleep(0.3)
+print(repr(text).replace(" ", "_"), len(sent))
+client.close()
+server.shutdown()
+') || true
+read -r TEXT SENT <<< "$RESULT"
+
+if [[ "$TEXT" == "'{\"action\":_\"next_task\"}'" ]]; then
+    pass "Returned only the decision JSON"
+else
+    fail "Returned $TEXT"
+fi
+
+if [[ -n "$SENT" ]] && (( SENT < 52 )); then
+    pass "Connection closed before the stream finished ($SENT of 52 tokens sent)"
+else
+    fail "Server sent ${SENT:-no} tokens, expected fewer than 52"
+fi
+
+echo ""
+
+# ─── Test 3: refactor decision table ────────────────────────────────────────
+echo "  ${BOLD}Test 3: Refactor decision table${RESET}"
+
+# Importing orchestrator.py starts the orchestrator, so pull just the table
+# and the status sets out of its source
+RESULT=$(orch_py '
+import ast
+tree = ast.parse(open("orchestrator.py").read())
+wanted = {"_PASS_STATUSES", "_FAIL_STATUSES", "_plan_refactor_result"}
+nodes = [
+    node for node in tree.body
+    if getattr(node, "name", None) in wanted
+    or isinstance(node, ast.Assign) and node.targets[0].id in wanted
+]
+env = {"max_attempts_per_task": 3}
+exec(compile(ast.Module(body=nodes, type_ignores=[]), "orchestrator.py", "exec"), env)
+plan = env["_plan_refactor_result"]
+cases = [(" Passed ", 1), ("PASS", 3), ("bugs_found", 1), ("fail", 3), ("weird", 1), ("weird", 3)]
+print(" ".join(f"{status.strip()}/{attempts}={plan(status, dict(attempts=attempts))}"
+               for status, attempts in cases))
+') || true
+EXPECTED="Passed/1=pass PASS/3=pass bugs_found/1=fix fail/3=stuck weird/1=None weird/3=flag_human"
+
+if [[ "$RESULT" == "$EXPECTED" ]]; then
+    pass "Known statuses planned by rule; unknown ones left to the LLM until attempts run out"
+else
+    fail "Got '$RESULT', expected '$EXPECTED'"
+fi
+
+echo ""
+
+# ─── Summary ────────────────────────────────────────────────────────────────
+echo "  ${BOLD}=============================${RESET}"
+if [[ $FAILURES -eq 0 ]]; then
+    echo "  ${GREEN}All tests passed!${RESET}"
+else
+    echo "  ${RED}$FAILURES test(s) failed${RESET}"
+fi
+echo "  ${BOLD}=============================${RESET}"
+echo ""
+
+exit $FAILURES
@@ -0,0 +1,282 @@
+#!/bin/bash
+# Test script: MailboxWatcher processed log
+# 1. A message read but not handled before the process dies is read again
+# 2. A handled message is not read again after a restart
+# 3. Handled messages are appended to .processed.log and stay processed
+# 4. The log is compacted, and evicted stems stay processed via the watermark
+# 5. A corrupt #evicted-before line is skipped at startup
+# 6. Recent history keeps the newest messages of a scan, in time order
+set -e
+
+BOLD=$(tput bold) RESET=$(tput sgr0)
+GREEN=$(tput setaf 2) RED=$(tput setaf 1)
+pass() { echo "  ${GREEN}PASS${RESET} $*"; }
+fail() { echo "  ${RED}FAIL${RESET} $*"; FAILURES=$((FAILURES + 1)); }
+FAILURES=0
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+ROOT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+TEST_DIR="/tmp/test-mailbox-watcher-$$"
+MAILBOX_DIR="$TEST_DIR/1"
+cleanup() {
+    rm -rf "$TEST_DIR" 2>/dev/null || true
+}
+trap cleanup EXIT
+
+# Write a message file the way the bridge does (file stem == message id)
+write_msg() {
+    local box="$1" id="$2" from="$3" timestamp="${4:-$(date -Iseconds)}"
+    mkdir -p "$MAILBOX_DIR/$box"
+    echo "{\"id\": \"$id\", \"from\": \"$from\", \"type\": \"test\", \"timestamp\": \"$timestamp\"}" \
+        > "$MAILBOX_DIR/$box/$id.json"
+}
+
+# Run python against the watcher module; $MAILBOX_DIR is passed as argv[1]
+watcher_py() {
+    (cd "$ROOT_DIR/orchestrator" && python3 -c "$1" "$MAILBOX_DIR" 2>/dev/null)
+}
+
+echo ""
+echo "  ${BOLD}Testing MailboxWatcher${RESET}"
+echo "  ======================"
+echo ""
+
+# ─── Test 1: killed with a handler still queued ─────────────────────────────
+echo "  ${BOLD}Test 1: Killed with a message still unhandled${RESET}"
+
+write_msg to_dev "msg-1000000000000-aaaa" qa
+write_msg to_dev "msg-1000000001000-bbbb" qa
+
+# Handle the first message, then die (SIGKILL: no atexit) before the second;
+# the outer subshell keeps bash's "Killed" notice off the output
+(watcher_py "
+import os, signal, sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+msgs = w.check_new_messages('dev')
+w.mark_handled(msgs[0])
+os.kill(os.getpid(), signal.SIGKILL)
+") 2>/dev/null || true
+
+AGAIN=$(watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+print(' '.join(m['id'] for m in w.check_new_messages('dev')) or 'none')
+w.stop()
+")
+
+if [[ "$AGAIN" == "msg-1000000001000-bbbb" ]]; then
+    pass "Unhandled message read again after the kill"
+else
+    fail "Expected only the unhandled message, got: $AGAIN"
+fi
+
+echo ""
+
+# ─── Test 2: clean exit with a message unhandled ────────────────────────────
+echo "  ${BOLD}Test 2: Clean exit with a message unhandled${RESET}"
+
+# The second message is still unhandled from test 1; save_processed() runs
+# at exit and must not log it
+AGAIN=$(watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+w.check_new_messages('dev')
+w.stop()
+" && watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+msgs = w.check_new_messages('dev')
+print(' '.join(m['id'] for m in msgs) or 'none')
+w.mark_handled(*msgs)
+w.stop()
+")
+
+if [[ "$AGAIN" == "msg-1000000001000-bbbb" ]]; then
+    pass "Unhandled message survived a clean exit"
+else
+    fail "Expected the unhandled message, got: $AGAIN"
+fi
+
+AGAIN=$(watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+print(' '.join(m['id'] for m in w.check_new_messages('dev')) or 'none')
+w.stop()
+")
+
+if [[ "$AGAIN" == "none" ]]; then
+    pass "Handled messages not read again"
+else
+    fail "Handled messages came back: $AGAIN"
+fi
+
+echo ""
+
+# ─── Test 3: processed log append and reload ───────────────────────────────
+echo "  ${BOLD}Test 3: Processed log append and reload${RESET}"
+MAILBOX_DIR="$TEST_DIR/3"
+
+for i in 1 2 3; do
+    write_msg to_qa "msg-100000000${i}000-cccc" dev
+done
+
+watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+for msg in w.check_new_messages('qa'):
+    w.mark_handled(msg)
+w.stop()
+"
+
+LINES=$(grep -c "^msg-" "$MAILBOX_DIR/.processed.log" || true)
+if [[ "$LINES" == "3" ]]; then
+    pass "One log line per handled message"
+else
+    fail "Expected 3 stems in the log, got $LINES"
+fi
+
+AGAIN=$(watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+print(len(w.check_new_messages('qa')))
+w.stop()
+")
+
+if [[ "$AGAIN" == "0" ]]; then
+    pass "Logged messages stay processed after a restart"
+else
+    fail "$AGAIN logged message(s) read again after a restart"
+fi
+
+echo ""
+
+# ─── Test 4: compaction and watermark ───────────────────────────────────────
+echo "  ${BOLD}Test 4: Compaction and eviction watermark${RESET}"
+MAILBOX_DIR="$TEST_DIR/4"
+
+for i in 1 2 3 4 5 6 7 8; do
+    write_msg to_qa "msg-100000000${i}000-dddd" dev
+done
+
+# Shrink the limits so eight messages evict five stems and compact the log
+LIMITS="
+import mailbox_watcher
+mailbox_watcher._PROCESSED_LIMIT = 3
+mailbox_watcher._PROCESSED_COMPACT_LINES = 6
+"
+
+RESULT=$(watcher_py "$LIMITS
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+for msg in w.check_new_messages('qa'):
+    w.mark_handled(msg)
+# Read the log before exit: save_processed() also rewrites it at exit
+log = w._processed_path.read_text().splitlines()
+print(w._evicted_before, len(w._processed), len(log) - 1, log[0].replace(' ', '='))
+w.stop()
+")
+read -r WATERMARK REMEMBERED LINES HEADER <<< "$RESULT"
+
+if [[ "$WATERMARK" == "1000000005.0" && "$REMEMBERED" == "3" ]]; then
+    pass "Evicted stems raised the watermark to the newest evicted time"
+else
+    fail "Expected watermark 1000000005.0 with 3 stems, got $WATERMARK with $REMEMBERED"
+fi
+
+if (( LINES <= 6 )) && [[ "$HEADER" == "#evicted-before=1000000005.0" ]]; then
+    pass "Log compacted to $LINES stems with the watermark header"
+else
+    fail "Log has $LINES stems and header '$HEADER'"
+fi
+
+AGAIN=$(watcher_py "$LIMITS
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+print(len(w.check_new_messages('qa')))
+w.stop()
+")
+
+if [[ "$AGAIN" == "0" ]]; then
+    pass "Evicted and remembered messages stay processed after a restart"
+else
+    fail "$AGAIN message(s) read again after a restart"
+fi
+
+echo ""
+
+# ─── Test 5: corrupt header ─────────────────────────────────────────────────
+echo "  ${BOLD}Test 5: Corrupt evicted-before line${RESET}"
+MAILBOX_DIR="$TEST_DIR/5"
+
+write_msg to_qa "msg-1000000001000-eeee" dev
+write_msg to_qa "msg-1000000002000-ffff" dev
+printf '#evicted-before garbage\nmsg-1000000001000-eeee\n' > "$MAILBOX_DIR/.processed.log"
+
+AGAIN=$(watcher_py "
+import sys
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+print(' '.join(m['id'] for m in w.check_new_messages('qa')) or 'none')
+w.stop()
+" || echo "crashed")
+
+if [[ "$AGAIN" == "msg-1000000002000-ffff" ]]; then
+    pass "Bad line skipped; the stems after it still load"
+else
+    fail "Expected only the unlogged message, got: $AGAIN"
+fi
+
+echo ""
+
+# ─── Test 6: history order ──────────────────────────────────────────────────
+echo "  ${BOLD}Test 6: Recent history order${RESET}"
+MAILBOX_DIR="$TEST_DIR/6"
+
+# QA's mailbox is scanned first but holds the newest message; six older Dev
+# messages would push it out of a six-message history if added in scan order
+RESULT=$(watcher_py "
+import json, sys
+from pathlib import Path
+from mailbox_watcher import MailboxWatcher
+w = MailboxWatcher(sys.argv[1])
+def write(box, i, from_):
+    stem = f'msg-100000000{i}000-{from_}'
+    msg = {'id': stem, 'from': from_, 'type': 'test', 'timestamp': f'2024-01-01T00:00:0{i}'}
+    (Path(sys.argv[1]) / box / f'{stem}.json').write_text(json.dumps(msg))
+write('to_qa', 9, 'dev')
+for i in range(6):
+    write('to_dev', i, 'qa')
+w.check_new_messages_batch(('qa', 'dev'))
+print(' '.join(m['timestamp'][-1] for m in w.get_recent_history(6)))
+w.stop()
+")
+
+if [[ "$RESULT" == "1 2 3 4 5 9" ]]; then
+    pass "Newest message kept and history in time order"
+else
+    fail "Expected seconds '1 2 3 4 5 9', got '$RESULT'"
+fi
+
+echo ""
+
+# ─── Summary ────────────────────────────────────────────────────────────────
+echo "  ${BOLD}=============================${RESET}"
+if [[ $FAILURES -eq 0 ]]; then
+    echo "  ${GREEN}All tests passed!${RESET}"
+else
+    echo "  ${RED}$FAILURES test(s) failed${RESET}"
+fi
+echo "  ${BOLD}=============================${RESET}"
+echo ""
+
+exit $FAILURES
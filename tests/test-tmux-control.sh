@@ -0,0 +1,98 @@
+#!/bin/bash
+# Test script: TmuxControlClient replies
+# 1. A chained command whose first part fails returns rc=1 straight away
+# 2. The client stays attached and usable after the error
+set -e
+
+BOLD=$(tput bold) RESET=$(tput sgr0)
+GREEN=$(tput setaf 2) RED=$(tput setaf 1)
+pass() { echo "  ${GREEN}PASS${RESET} $*"; }
+fail() { echo "  ${RED}FAIL${RESET} $*"; FAILURES=$((FAILURES + 1)); }
+FAILURES=0
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+ROOT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+if ! command -v tmux >/dev/null; then
+    echo "  tmux not installed -- skipping"
+    exit 0
+fi
+
+# Private tmux server so the test never touches the user's sessions
+export TMUX_TMPDIR="/tmp/test-tmux-control-$$"
+unset TMUX
+mkdir -p "$TMUX_TMPDIR"
+SESSION="tmux-control-test"
+
+cleanup() {
+    tmux kill-server 2>/dev/null || true
+    rm -rf "$TMUX_TMPDIR" 2>/dev/null || true
+}
+trap cleanup EXIT
+
+tmux new-session -d -s "$SESSION" -n main
+
+echo ""
+echo "  ${BOLD}Testing TmuxControlClient${RESET}"
+echo "  ========================="
+echo ""
+
+RESULT=$(cd "$ROOT_DIR/orchestrator" && python3 -c "
+import time
+from tmux_control import TmuxControlClient
+
+client = TmuxControlClient('$SESSION')
+start = time.monotonic()
+bad = client.run(
+    ['send-keys', '-t', '$SESSION:nope', '-l', 'hi'],
+    ['run-shell', '-d', '0.2'],
+    ['send-keys', '-t', '$SESSION:nope', 'Enter'],
+    timeout=3.0,
+)
+elapsed = time.monotonic() - start
+good = client.run(['display-message', '-p', 'ok'])
+client.close()
+print(bad is not None and bad.returncode, 'fast' if elapsed < 1.0 else f'slow({elapsed:.1f}s)',
+      good is not None and good.returncode, good is not None and good.stdout)
+")
+
+# ─── Test 1: bad target ─────────────────────────────────────────────────────
+echo "  ${BOLD}Test 1: Chained command with a bad target${RESET}"
+read -r BAD_RC SPEED GOOD_RC GOOD_OUT <<< "$RESULT"
+
+if [[ "$BAD_RC" == "1" ]]; then
+    pass "Bad target returned rc=1"
+else
+    fail "Bad target returned rc=$BAD_RC, expected 1"
+fi
+
+if [[ "$SPEED" == "fast" ]]; then
+    pass "Error returned without waiting for the timeout"
+else
+    fail "Error took too long: $SPEED"
+fi
+
+echo ""
+
+# ─── Test 2: client still usable ────────────────────────────────────────────
+echo "  ${BOLD}Test 2: Client usable after an error${RESET}"
+
+if [[ "$GOOD_RC" == "0" && "$GOOD_OUT" == "ok" ]]; then
+    pass "Next command ran on the same client"
+else
+    fail "Next command got rc=$GOOD_RC output='$GOOD_OUT'"
+fi
+
+echo ""
+
+# ─── Summary ────────────────────────────────────────────────────────────────
+echo "  ${BOLD}=============================${RESET}"
+if [[ $FAILURES -eq 0 ]]; then
+    echo "  ${GREEN}All tests passed!${RESET}"
+else
+    echo "  ${RED}$FAILURES test(s) failed${RESET}"
+fi
+echo "  ${BOLD}=============================${RESET}"
+echo ""
+
+exit $FAILURES